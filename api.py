@@ -0,0 +1,140 @@
+import argparse
+import asyncio
+import hashlib
+import json
+import os
+import threading
+
+import tornado.web
+
+from database import Database
+
+# Identifies this process so ETags never survive a restart or match another replica's
+_BOOT_ID = os.urandom(4).hex()
+
+PUBLIC_ITEM_FIELDS = (
+    'id', 'title', 'description', 'item_type', 'status', 'image_url',
+    'latitude', 'longitude', 'created_at', 'updated_at'
+)
+
+
+def public_item(item):
+    """Fields of an item that are safe to show on kiosks and the campus portal"""
+    return {field: item[field] for field in PUBLIC_ITEM_FIELDS}
+
+
+class ApiHandler(tornado.web.RequestHandler):
+    """
+    Base handler for the read-only API
+    ETags are derived from the database change generation, so a repeat poll with
+    If-None-Match is answered with 304 without running any SQL
+    """
+
+    def initialize(self, db, max_age):
+        self.db = db
+        self.max_age = max_age
+
+    def int_argument(self, name, default):
+        try:
+            return int(self.get_argument(name, str(default)))
+        except ValueError:
+            raise tornado.web.HTTPError(400, reason=f"{name} must be an integer")
+
+    def compute_etag(self):
+        # Tornado would hash the whole body; ours is known before the query runs
+        return None
+
+    async def respond(self, build):
+        # Cheap PRAGMA data_version check; bumps the generation if anything was committed
+        self.db.sync_changes()
+        resource = hashlib.sha1(self.request.uri.encode()).hexdigest()[:16]
+        etag = f'"{_BOOT_ID}-{self.db.change_tracker.generation}-{resource}"'
+
+        self.set_header('ETag', etag)
+        self.set_header('Cache-Control', f'public, max-age={self.max_age}')
+        if etag in self.request.headers.get('If-None-Match', ''):
+            self.set_status(304)
+            return
+
+        # SQLite calls are blocking; keep them off the event loop
+        body = await asyncio.get_running_loop().run_in_executor(None, build)
+        if body is None:
+            raise tornado.web.HTTPError(404)
+        self.set_header('Content-Type', 'application/json; charset=UTF-8')
+        self.write(json.dumps(body))
+
+
+class ItemsHandler(ApiHandler):
+    async def get(self):
+        page = max(self.int_argument('page', 1), 1)
+        per_page = min(max(self.int_argument('per_page', 20), 1), 100)
+        item_type = self.get_argument('type', None)
+        if item_type not in (None, 'lost', 'found'):
+            raise tornado.web.HTTPError(400, reason="type must be 'lost' or 'found'")
+
+        def build():
+            items, total = self.db.get_items_page(per_page, (page - 1) * per_page, item_type)
+            return {
+                'items': [public_item(item) for item in items],
+                'page': page,
+                'per_page': per_page,
+                'total': total
+            }
+
+        await self.respond(build)
+
+
+class ItemDetailHandler(ApiHandler):
+    async def get(self, item_id):
+        def build():
+            item = self.db.get_item(int(item_id))
+            if not item:
+                return None
+            detail = public_item(item)
+            detail['images'] = self.db.get_item_images(item['id']) or ([item['image_url']] if item['image_url'] else [])
+            return detail
+
+        await self.respond(build)
+
+
+class StatsHandler(ApiHandler):
+    async def get(self):
+        await self.respond(self.db.get_item_stats)
+
+
+def make_app(db, max_age=15):
+    settings = {'db': db, 'max_age': max_age}
+    return tornado.web.Application([
+        (r"/api/items", ItemsHandler, settings),
+        (r"/api/items/(\d+)", ItemDetailHandler, settings),
+        (r"/api/stats", StatsHandler, settings),
+    ])
+
+
+_servers = {}
+_servers_lock = threading.Lock()
+
+
+def start_api_server(db, port, address=""):
+    """Serve the API from a background thread with its own event loop, once per process and port"""
+    with _servers_lock:
+        if port in _servers:
+            return _servers[port]
+
+        async def serve():
+            make_app(db).listen(port, address)
+            await asyncio.Event().wait()
+
+        thread = threading.Thread(target=asyncio.run, args=(serve(),), name=f"api-{port}", daemon=True)
+        thread.start()
+        _servers[port] = thread
+        return thread
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Read-only JSON API for Campus Lost & Found")
+    parser.add_argument("--db", default="database/campus_lost_found.db", help="Path to the SQLite database")
+    parser.add_argument("--port", type=int, default=8502)
+    args = parser.parse_args()
+
+    start_api_server(Database(args.db), args.port).join()
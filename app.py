@@ -1,11 +1,8 @@
 import streamlit as st
 from database import Database
-from auth import Auth
+from auth import Auth, PBKDF2Hasher
 from storage import ImageStorage, LocalImageStorage
 
-# Import Views
-from views import auth_view, item_view, message_view, admin_view
-
 # Page configuration
 st.set_page_config(
     page_title="Campus Lost & Found",
@@ -14,16 +11,69 @@ st.set_page_config(
     initial_sidebar_state="expanded"
 )
 
-# Initialize Services
-db = Database()
-auth = Auth()
+def get_setting(name, default=None):
+    """Read an optional setting from .streamlit/secrets.toml"""
+    if hasattr(st.secrets, name):
+        return st.secrets[name]
+    return default
+
+@st.cache_resource
+def get_services():
+    """Build the database, auth and storage services once per server process, not on every rerun"""
+    # DATABASE_PATH points the app at another SQLite file (e.g. a seeded copy for load tests)
+    # USE_WRITE_QUEUE = true routes all writes through a single group-committing writer thread
+    # MULTI_PROCESS = true when several app processes share the same database file
+    db = Database(
+        get_setting("DATABASE_PATH", "database/campus_lost_found.db"),
+        use_write_queue=get_setting("USE_WRITE_QUEUE", False),
+        multi_process=get_setting("MULTI_PROCESS", False)
+    )
+    # PASSWORD_HASH_ITERATIONS tunes the PBKDF2 cost; older hashes are upgraded at their next login
+    auth = Auth(db, PBKDF2Hasher(get_setting("PASSWORD_HASH_ITERATIONS", 310000)))
+
+    # Periodic ANALYZE/vacuum/checkpoint in the off-peak window; set MAINTENANCE_IN_APP = false
+    # when running `python maintenance.py --loop` as a separate process instead
+    if get_setting("MAINTENANCE_IN_APP", True):
+        from maintenance import start_scheduler
+        start_scheduler(
+            db,
+            window=tuple(get_setting("MAINTENANCE_WINDOW", (2, 5))),
+            archive_after_days=get_setting("ARCHIVE_AFTER_DAYS", None)
+        )
+
+    # Read-only JSON API for kiosks and the campus portal, e.g. API_PORT = 8502
+    if get_setting("API_PORT"):
+        from api import start_api_server
+        start_api_server(db, int(get_setting("API_PORT")))
 
-# Use local storage if no API key is set in .streamlit/secrets.toml
-if hasattr(st.secrets, "IMGBB_API_KEY"):
-    storage = ImageStorage()
-    storage.api_key = st.secrets.IMGBB_API_KEY
-else:
-    storage = LocalImageStorage()
+    # Email digests of new messages and likely matches, e.g. SMTP_HOST = "smtp.campus.edu";
+    # leave unset when running `python notifications.py --loop` as a separate process instead
+    if get_setting("SMTP_HOST"):
+        from notifications import start_dispatcher
+        start_dispatcher(
+            db,
+            get_setting("SMTP_SENDER", "lostfound@campus.edu"),
+            interval_seconds=get_setting("NOTIFY_INTERVAL_SECONDS", 300),
+            host=get_setting("SMTP_HOST"),
+            port=get_setting("SMTP_PORT", 25),
+            username=get_setting("SMTP_USERNAME"),
+            password=get_setting("SMTP_PASSWORD"),
+            starttls=get_setting("SMTP_STARTTLS", False)
+        )
+
+    # Use local storage if no API key is set in .streamlit/secrets.toml
+    if hasattr(st.secrets, "IMGBB_API_KEY"):
+        storage = ImageStorage(db)
+        storage.api_key = st.secrets.IMGBB_API_KEY
+        # Only changed to point at a stand-in host, e.g. by loadtest.py
+        storage.upload_url = get_setting("IMGBB_UPLOAD_URL", storage.upload_url)
+    else:
+        storage = LocalImageStorage()
+
+    return db, auth, storage
+
+# Initialize Services
+db, auth, storage = get_services()
 
 def init_session_state():
     
@@ -33,202 +83,26 @@ def init_session_state():
     if 'page' not in st.session_state:
         st.session_state.page = "login"
 
+@st.cache_data
+def load_css(path="assets/style.css"):
+    """Read the stylesheet once per process instead of rebuilding it on every rerun"""
+    with open(path, encoding="utf-8") as css_file:
+        return f"<style>{css_file.read()}</style>"
+
 def apply_custom_css():
     """Apply custom CSS styling"""
-    st.markdown("""
-    <style>
-        /* Hide Streamlit deploy button and other UI elements */
-        /* #MainMenu {visibility: hidden;} */
-        footer {visibility: hidden;}
-        /* header {visibility: hidden;} */
-        .stDeployButton {display: none;}
-        button[kind="header"] {display: none;}
-        
-        /* Main app styling - clean white background */
-        .stApp {
-            background: #ffffff;
-        }
-        
-        /* Content area */
-        .main .block-container {
-            padding-top: 2rem;
-            padding-bottom: 2rem;
-        }
-        
-        /* Style the form container to have purple background */
-        div[data-testid="stForm"] {
-            background: linear-gradient(135deg, #667eea 0%, #764ba2 100%);
-            padding: 2rem;
-            border-radius: 16px;
-            box-shadow: 0 10px 40px rgba(102, 126, 234, 0.3);
-        }
-        
-        /* Form labels to be white on purple background */
-        div[data-testid="stForm"] label {
-            color: white !important;
-            font-weight: 500;
-        }
-        
-        /* Form inputs on purple background */
-        div[data-testid="stForm"] input {
-            background: rgba(255, 255, 255, 0.95) !important;
-            border: 2px solid rgba(255, 255, 255, 0.3) !important;
-        }
-        
-        div[data-testid="stForm"] input:focus {
-            border-color: white !important;
-            box-shadow: 0 0 0 3px rgba(255, 255, 255, 0.3) !important;
-        }
-        
-        /* Form buttons on purple card */
-        div[data-testid="stForm"] button[kind="primary"] {
-            background: white !important;
-            color: #667eea !important;
-            font-weight: 600;
-            width: 100%;
-            border: none !important;
-        }
-        
-        div[data-testid="stForm"] button[kind="primary"]:hover {
-            background: rgba(255, 255, 255, 0.9) !important;
-            transform: translateY(-2px);
-        }
-        
-        /* AGGRESSIVE hiding of all form helper text */
-        div[data-testid="stForm"] small,
-        div[data-testid="stForm"] .row-widget.stButton small,
-        div[data-testid="stForm"] .stMarkdown small,
-        .stForm small,
-        form small,
-        [data-testid="stForm"] p[class*="caption"],
-        [data-testid="stFormSubmitContent"] small,
-        .element-container small {
-            display: none !important;
-            visibility: hidden !important;
-            height: 0 !important;
-            overflow: hidden !important;
-        }
-        
-        /* Hide instruction text from text inputs */
-        .stTextInput small {
-            display: none !important;
-        }
-        
-        /* Headers */
-        h1 {
-            color: #1e293b;
-            font-weight: 700;
-            letter-spacing: -0.5px;
-        }
-        
-        h2 {
-            color: #334155;
-            font-weight: 600;
-            margin-top: 1.5rem;
-        }
-        
-        h3 {
-            color: #475569;
-            font-weight: 600;
-        }
-        
-        /* Buttons - subtle purple accent */
-        .stButton > button {
-            background: #667eea;
-            color: white;
-            border: none;
-            border-radius: 8px;
-            padding: 0.5rem 1.5rem;
-            font-weight: 500;
-            transition: all 0.2s;
-        }
-        
-        .stButton > button:hover {
-            background: #5568d3;
-            transform: translateY(-1px);
-            box-shadow: 0 2px 8px rgba(102, 126, 234, 0.3);
-        }
-        
-        /* Form inputs */
-        .stTextInput > div > div > input,
-        .stTextArea > div > div > textarea,
-        .stSelectbox > div > div > select {
-            border-radius: 8px;
-            border: 1px solid #e2e8f0;
-            transition: border-color 0.3s;
-        }
-        
-        .stTextInput > div > div > input:focus,
-        .stTextArea > div > div > textarea:focus,
-        .stSelectbox > div > div > select:focus {
-            border-color: #667eea;
-            box-shadow: 0 0 0 3px rgba(102, 126, 234, 0.1);
-        }
-        
-        /* Sidebar - clean dark theme */
-        section[data-testid="stSidebar"] {
-            background: #1e293b;
-        }
-        
-        section[data-testid="stSidebar"] * {
-            color: white !important;
-        }
-        
-        /* Tabs - minimal styling */
-        .stTabs [data-baseweb="tab-list"] {
-            gap: 8px;
-            background-color: #f8fafc;
-            border-radius: 10px;
-            padding: 4px;
-        }
-        
-        .stTabs [data-baseweb="tab"] {
-            border-radius: 8px;
-            padding: 8px 16px;
-            font-weight: 500;
-            color: #64748b;
-        }
-        
-        .stTabs [aria-selected="true"] {
-            background: #667eea;
-            color: white;
-        }
-        
-        /* Cards/Containers */
-        div[data-testid="stExpander"] {
-            border: 1px solid #e2e8f0;
-            border-radius: 10px;
-            background: #f8fafc;
-        }
-        
-        /* Metrics - subtle purple */
-        div[data-testid="stMetricValue"] {
-            color: #667eea;
-            font-weight: 700;
-        }
-        
-        /* Info, Success, Error boxes */
-        .stAlert {
-            border-radius: 10px;
-            border-left: 4px solid;
-        }
-        
-        /* File uploader */
-        section[data-testid="stFileUploadDropzone"] {
-            border-radius: 10px;
-            border: 2px dashed #cbd5e1;
-            background: #f8fafc;
-        }
-    </style>
-    """, unsafe_allow_html=True)
+    st.markdown(load_css(), unsafe_allow_html=True)
 
 def main():
     """Main application controller"""
     init_session_state()
     apply_custom_css()
+    # Drop process-local caches if another session or replica wrote since the last rerun
+    db.sync_changes()
 
     # 1. Login Flow
     if st.session_state.user is None:
+        from views import auth_view
         auth_view.show_login_page(auth)
         return
 
@@ -241,8 +115,12 @@ def main():
     if st.session_state.user['role'] == 'admin':
         pages.append("Admin Panel")
     
-    # Add key="navigation" so we can change it via code
-    selected_page = st.sidebar.radio("Go to", pages, key="navigation")
+    # The radio is drawn into this slot after the page runs, so its unread badge counts the
+    # messages the page just marked read; until then its value is read from session state
+    navigation = st.sidebar.container()
+    if st.session_state.get("navigation") not in pages:
+        st.session_state.navigation = pages[0]
+    selected_page = st.session_state.navigation
     
     if st.sidebar.button("Logout"):
         st.session_state.user = None
@@ -250,16 +128,32 @@ def main():
         st.rerun()
 
     # 3. Page Routing
-    if selected_page == "Browse Items":
-        item_view.show_browse_items(db)
-    elif selected_page == "My Items":
-        item_view.show_my_items(db)
-    elif selected_page == "Report Item":
-        item_view.show_report_item(db, storage)
-    elif selected_page == "Messages":
-        message_view.show_messages(db)
-    elif selected_page == "Admin Panel":
-        admin_view.show_admin_panel(db, auth)
+    # Views are imported on first use so the login page doesn't pay for the others
+    try:
+        if selected_page == "Browse Items":
+            from views import item_view
+            item_view.show_browse_items(db)
+        elif selected_page == "My Items":
+            from views import item_view
+            item_view.show_my_items(db)
+        elif selected_page == "Report Item":
+            from views import item_view
+            item_view.show_report_item(db, storage)
+        elif selected_page == "Messages":
+            from views import message_view
+            message_view.show_messages(db)
+        elif selected_page == "Admin Panel":
+            from views import admin_view
+            admin_view.show_admin_panel(db, auth)
+    finally:
+        # Drawn even if the page raised, so the user can still navigate away from it
+        # Unread badge on Messages; the count is a trigger-maintained counter, not a scan
+        unread = db.get_unread_count(st.session_state.user['id'])
+        # key="navigation" so the choice survives reruns and can be changed via code
+        navigation.radio(
+            "Go to", pages, key="navigation",
+            format_func=lambda page: f"{page} ({unread})" if page == "Messages" and unread else page
+        )
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -1,14 +1,104 @@
 import hashlib
+import hmac
+import os
+from concurrent.futures import ThreadPoolExecutor
 import streamlit as st
 from database import Database
+from ratelimit import RateLimiter
+
+
+class PBKDF2Hasher:
+    """PBKDF2-HMAC-SHA256, stored as pbkdf2_sha256$iterations$salt$hash"""
+    algorithm = 'pbkdf2_sha256'
+
+    def __init__(self, iterations=310000):
+        self.iterations = iterations
+
+    def hash(self, password, salt=None):
+        salt = salt or os.urandom(16)
+        digest = hashlib.pbkdf2_hmac('sha256', password.encode(), salt, self.iterations)
+        return f"{self.algorithm}${self.iterations}${salt.hex()}${digest.hex()}"
+
+    @classmethod
+    def from_encoded(cls, encoded):
+        _, iterations, _, _ = encoded.split('$')
+        return cls(int(iterations))
+
+    def verify(self, password, encoded):
+        _, _, salt, _ = encoded.split('$')
+        return hmac.compare_digest(self.hash(password, bytes.fromhex(salt)), encoded)
+
+    def cost(self):
+        return self.iterations
+
+
+class ScryptHasher:
+    """scrypt, stored as scrypt$n$r$p$salt$hash"""
+    algorithm = 'scrypt'
+
+    def __init__(self, n=2 ** 14, r=8, p=1):
+        self.n = n
+        self.r = r
+        self.p = p
+
+    def hash(self, password, salt=None):
+        salt = salt or os.urandom(16)
+        digest = hashlib.scrypt(password.encode(), salt=salt, n=self.n, r=self.r, p=self.p, maxmem=256 * 1024 * 1024)
+        return f"{self.algorithm}${self.n}${self.r}${self.p}${salt.hex()}${digest.hex()}"
+
+    @classmethod
+    def from_encoded(cls, encoded):
+        _, n, r, p, _, _ = encoded.split('$')
+        return cls(int(n), int(r), int(p))
+
+    def verify(self, password, encoded):
+        salt = encoded.split('$')[4]
+        return hmac.compare_digest(self.hash(password, bytes.fromhex(salt)), encoded)
+
+    def cost(self):
+        return self.n * self.r * self.p
+
+
+HASHERS = {hasher.algorithm: hasher for hasher in (PBKDF2Hasher, ScryptHasher)}
+
+# Bounded pool so concurrent logins can't occupy more than a couple of cores with KDF work
+_kdf_pool = ThreadPoolExecutor(max_workers=2, thread_name_prefix="password-kdf")
+
+# Throttles are process-wide: Auth is re-created on every rerun
+_username_throttle = RateLimiter(capacity=5, rate=1 / 30)
+_client_throttle = RateLimiter(capacity=20, rate=1 / 3)
+
 
 class Auth:
-    def __init__(self):
-        self.db = Database()
+    def __init__(self, db=None, hasher=None):
+        self.db = db or Database()
+        self.hasher = hasher or PBKDF2Hasher()
     
     def hash_password(self, password):
-        """Hash password using SHA-256"""
-        return hashlib.sha256(password.encode()).hexdigest()
+        """Hash password with the configured KDF and a random salt"""
+        return self.hasher.hash(password)
+    
+    def verify_password(self, password, password_hash):
+        """
+        Check a password against a stored hash of any supported format
+        Returns (valid, needs_rehash)
+        """
+        if '$' not in password_hash:
+            # Legacy unsalted SHA-256 hex digest
+            legacy = hashlib.sha256(password.encode()).hexdigest()
+            return hmac.compare_digest(legacy, password_hash), True
+        
+        algorithm = password_hash.split('$', 1)[0]
+        if algorithm not in HASHERS:
+            return False, False
+        try:
+            stored = HASHERS[algorithm].from_encoded(password_hash)
+            valid = stored.verify(password, password_hash)
+        except (ValueError, TypeError, OverflowError):
+            # Malformed or truncated stored hash: treat as a failed login, not a crash
+            return False, False
+        needs_rehash = algorithm != self.hasher.algorithm or stored.cost() < self.hasher.cost()
+        return valid, needs_rehash
     
     def register_user(self, username, password, role, email):
         """Register a new user"""
@@ -21,7 +111,7 @@ class Auth:
         if role not in ['student', 'admin']:
             return False, "Invalid role"
         
-        password_hash = self.hash_password(password)
+        password_hash = _kdf_pool.submit(self.hash_password, password).result()
         success = self.db.create_user(username, password_hash, role, email)
         
         if success:
@@ -29,14 +119,25 @@ class Auth:
         else:
             return False, "Username already exists"
     
-    def login_user(self, username, password):
+    def login_user(self, username, password, client_id=None):
         """Authenticate user"""
+        # Every attempt counts against the client; only failed ones count against the username,
+        # so its owner can keep logging in and a guesser is slowed to the bucket's refill rate
+        if (client_id and not _client_throttle.allow(client_id)) or not _username_throttle.check(username):
+            return False, "Too many login attempts. Please wait a minute and try again.", None
+        
         user = self.db.get_user_by_username(username)
         if not user:
+            _username_throttle.allow(username)
             return False, "User not found", None
         
-        password_hash = self.hash_password(password)
-        if user['password_hash'] == password_hash:
+        valid, needs_rehash = _kdf_pool.submit(self.verify_password, password, user['password_hash']).result()
+        if valid:
+            if needs_rehash:
+                # Transparently move old hashes to the current KDF and cost
+                new_hash = _kdf_pool.submit(self.hash_password, password).result()
+                self.db.update_password_hash(user['id'], new_hash)
+            
             user_dict = {
                 'id': user['id'],
                 'username': user['username'],
@@ -45,6 +146,7 @@ class Auth:
             }
             return True, "Login successful", user_dict
         else:
+            _username_throttle.allow(username)
             return False, "Invalid password", None
     
     def check_permissions(self, user, item_user_id=None):
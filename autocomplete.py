@@ -0,0 +1,122 @@
+import bisect
+import heapq
+import re
+import threading
+
+# Highest code point, so prefix + _MAX_CHAR sorts after every term starting with prefix
+_MAX_CHAR = '\U0010ffff'
+
+
+def tokenize(text):
+    return re.findall(r'[a-z0-9]+', text.lower())
+
+
+class AutocompleteIndex:
+    """
+    In-memory prefix index of active item-title terms, weighted by how many items use them
+    Terms live in a sorted list, so a prefix lookup is two bisects plus a top-k over the range
+    """
+
+    def __init__(self, synonyms=None):
+        self._terms = []
+        self._weights = {}
+        self._item_terms = {}
+        self._lock = threading.Lock()
+        self.synonyms = {}
+        self._aliases = []
+        self.set_synonyms(synonyms or {})
+        self.last_seq = 0
+        self.stale = True
+
+    def set_synonyms(self, synonyms):
+        """synonyms maps alias -> canonical term, e.g. {'air pods': 'airpods'}"""
+        self.synonyms = dict(synonyms)
+        self._aliases = sorted(self.synonyms)
+
+    def _add_term(self, term):
+        if term not in self._weights:
+            self._weights[term] = 0
+            bisect.insort(self._terms, term)
+        self._weights[term] += 1
+
+    def _remove_term(self, term):
+        self._weights[term] -= 1
+        if self._weights[term] == 0:
+            del self._weights[term]
+            del self._terms[bisect.bisect_left(self._terms, term)]
+
+    def update_item(self, item_id, title):
+        """Index an item's title, replacing its previous terms; title=None removes the item"""
+        with self._lock:
+            for term in self._item_terms.pop(item_id, ()):
+                self._remove_term(term)
+            if title:
+                terms = set(tokenize(title))
+                for term in terms:
+                    self._add_term(term)
+                self._item_terms[item_id] = terms
+
+    def rebuild(self, titles, last_seq):
+        with self._lock:
+            self._terms = []
+            self._weights = {}
+            self._item_terms = {}
+        for item_id, title in titles:
+            self.update_item(item_id, title)
+        self.last_seq = last_seq
+
+    def suggest(self, prefix, limit=5):
+        """Most frequent indexed terms starting with prefix, with synonyms resolved to their canonical term"""
+        prefix = prefix.lower().strip()
+        if not prefix:
+            return []
+
+        with self._lock:
+            lo = bisect.bisect_left(self._terms, prefix)
+            hi = bisect.bisect_left(self._terms, prefix + _MAX_CHAR)
+            scored = {term: self._weights[term] for term in self._terms[lo:hi]}
+
+        lo = bisect.bisect_left(self._aliases, prefix)
+        hi = bisect.bisect_left(self._aliases, prefix + _MAX_CHAR)
+        for alias in self._aliases[lo:hi]:
+            canonical = self.synonyms[alias]
+            # Canonical terms that no active item uses still get suggested, just ranked last
+            scored.setdefault(canonical, self._weights.get(canonical, 0))
+
+        return heapq.nlargest(limit, scored, key=lambda term: (scored[term], term == prefix))
+
+    def expand(self, query):
+        """The query plus every synonym of it, for matching against item text"""
+        query = query.lower().strip()
+        canonical = self.synonyms.get(query, query)
+        return {query, canonical} | {alias for alias, target in self.synonyms.items() if target == canonical}
+
+
+_indexes = {}
+_indexes_lock = threading.Lock()
+
+
+def get_autocomplete(db):
+    """
+    Return the process-wide index for a database, brought up to date with the item change log
+    Only items changed since the last refresh are re-tokenised
+    """
+    with _indexes_lock:
+        index = _indexes.get(db.db_name)
+        if index is None:
+            index = _indexes[db.db_name] = AutocompleteIndex()
+            index.set_synonyms(db.get_search_synonyms())
+            index.rebuild(*db.get_active_titles())
+            index.stale = False
+
+        db.change_tracker.register('autocomplete', lambda: setattr(index, 'stale', True))
+        if index.stale:
+            index.stale = False
+            changes = db.get_item_changes(index.last_seq)
+            if changes is None:
+                index.rebuild(*db.get_active_titles())
+            else:
+                for item_id, title in changes[0]:
+                    index.update_item(item_id, title)
+                index.last_seq = changes[1]
+        return index
@@ -0,0 +1,78 @@
+import argparse
+import gc
+import os
+import random
+import tempfile
+import time
+import tracemalloc
+
+from database import Database
+
+WORDS = ['black', 'blue', 'phone', 'wallet', 'keys', 'bottle', 'charger', 'library', 'gym', 'hall',
+         'card', 'bag', 'left', 'near', 'found', 'lost', 'desk', 'seat', 'window', 'corner']
+
+
+def seed_items(db, count, seed):
+    """Insert count items with realistic description lengths in one transaction"""
+    rng = random.Random(seed)
+    conn = db.get_connection()
+    conn.executemany(
+        'INSERT INTO items (title, description, item_type, image_url, status, user_id) VALUES (?, ?, ?, ?, ?, ?)',
+        (
+            (
+                ' '.join(rng.choices(WORDS, k=3)).title(),
+                ' '.join(rng.choices(WORDS, k=rng.randint(15, 60))),
+                rng.choice(['lost', 'found']),
+                f"https://i.ibb.co/{rng.getrandbits(40):x}/photo.jpg" if rng.random() < 0.6 else None,
+                rng.choice(['active', 'active', 'claimed', 'resolved']),
+                1
+            )
+            for _ in range(count)
+        )
+    )
+    conn.commit()
+    conn.close()
+
+
+def measure(fetch, repeat):
+    """Return (rows, retained bytes per row, best fetch time in seconds)"""
+    gc.collect()
+    tracemalloc.start()
+    rows = fetch()
+    retained = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    count = len(rows)
+    del rows
+
+    best = float('inf')
+    for _ in range(repeat):
+        gc.collect()
+        started = time.perf_counter()
+        fetch()
+        best = min(best, time.perf_counter() - started)
+    return count, retained / max(count, 1), best
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Memory and decode cost of full rows vs projected list records")
+    parser.add_argument("--items", type=int, default=100_000)
+    parser.add_argument("--repeat", type=int, default=5, help="Timed fetches per query; the best is reported")
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    db = Database(os.path.join(tempfile.mkdtemp(prefix='spm-bench-'), 'bench.db'))
+    print(f"Seeding {args.items} items ...")
+    seed_items(db, args.items, args.seed)
+
+    comparisons = [
+        ("Browse Items", lambda: db.get_all_items(status='active'), db.get_item_cards),
+        ("Admin list", db.get_all_items, db.get_admin_item_rows),
+        ("My Items", lambda: db.get_user_items(1), lambda: db.get_my_items(1)),
+    ]
+
+    print(f"\n{'view':<14}{'rows':>8}{'':>4}{'bytes/row':>12}{'fetch ms':>10}{'µs/row':>8}")
+    for view, full, projected in comparisons:
+        for label, fetch in (('Row', full), ('record', projected)):
+            count, per_row, best = measure(fetch, args.repeat)
+            print(f"{view if label == 'Row' else '':<14}{count:>8}  {label:<7}{per_row:>9.0f}{best * 1000:>10.1f}"
+                  f"{best / max(count, 1) * 1e6:>8.2f}")
@@ -0,0 +1,112 @@
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+APP_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'app.py')
+# Only the pages that need these should pay for importing them
+HEAVY_MODULES = ['PIL', 'requests', 'pandas', 'altair', 'numpy']
+MARKER = '--- app runs start here ---'
+
+
+def profile(db_path, reruns):
+    """Runs inside a fresh interpreter; returns cold-run, rerun and module figures"""
+    from streamlit.testing.v1 import AppTest
+    from database import Database
+
+    Database(db_path)
+    # Streamlit itself may already have pulled some of these in; only count what the app adds
+    preloaded = {name for name in HEAVY_MODULES if name in sys.modules}
+    settings = {'DATABASE_PATH': db_path, 'MAINTENANCE_IN_APP': False}
+    user = {'id': 1, 'username': 'admin', 'role': 'student', 'email': 'admin@campus.edu'}
+
+    def timed_runs(at, count):
+        times = []
+        for _ in range(count):
+            started = time.perf_counter()
+            at.run()
+            times.append((time.perf_counter() - started) * 1000)
+            if at.exception:
+                raise RuntimeError(at.exception[0].message)
+        return times
+
+    sys.stderr.write(MARKER + '\n')
+    sys.stderr.flush()
+    login = AppTest.from_file(APP_PATH, default_timeout=60)
+    login.secrets = settings
+    cold_ms = timed_runs(login, 1)[0]
+    login_ms = timed_runs(login, reruns)
+
+    browse = AppTest.from_file(APP_PATH, default_timeout=60)
+    browse.secrets = settings
+    browse.session_state['user'] = user
+    browse_ms = timed_runs(browse, reruns + 1)[1:]
+
+    return {
+        'cold_ms': cold_ms,
+        'login_rerun_ms': sorted(login_ms)[len(login_ms) // 2],
+        'browse_rerun_ms': sorted(browse_ms)[len(browse_ms) // 2],
+        'heavy_modules_loaded': [name for name in HEAVY_MODULES if name in sys.modules and name not in preloaded],
+    }
+
+
+def import_profile(stderr, top):
+    """Slowest cumulative imports triggered by the app itself, from python -X importtime output"""
+    imports = []
+    for line in stderr.split(MARKER, 1)[-1].splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        _, cumulative, name = line[len('import time:'):].split('|')
+        # Nested imports are indented and already counted in their parent's cumulative time
+        if not name[1:].startswith(' '):
+            imports.append((int(cumulative) / 1000, name.strip()))
+    return sorted(imports, reverse=True)[:top]
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Cold start and per-rerun cost of app.py, with budgets")
+    parser.add_argument("--reruns", type=int, default=20, help="Warm reruns to time per page (median is reported)")
+    parser.add_argument("--max-cold-ms", type=float, default=600, help="Budget for the first run in a fresh process")
+    parser.add_argument("--max-login-rerun-ms", type=float, default=40, help="Budget for a login page rerun")
+    parser.add_argument("--max-browse-rerun-ms", type=float, default=50, help="Budget for a Browse Items rerun")
+    parser.add_argument("--top", type=int, default=10, help="Slowest imports to list")
+    parser.add_argument("--child", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        print(json.dumps(profile(args.child, args.reruns)))
+        sys.exit(0)
+
+    # Measure in a fresh interpreter so the cold run really starts cold
+    db_path = os.path.join(tempfile.mkdtemp(prefix='spm-startup-'), 'startup.db')
+    child = subprocess.run(
+        [sys.executable, '-X', 'importtime', os.path.abspath(__file__), '--child', db_path, '--reruns', str(args.reruns)],
+        capture_output=True, text=True, cwd=os.path.dirname(APP_PATH)
+    )
+    if child.returncode != 0:
+        sys.exit(child.stderr[-2000:])
+    result = json.loads(child.stdout.strip().splitlines()[-1])
+
+    print("Slowest imports during the first run:")
+    for ms, name in import_profile(child.stderr, args.top):
+        print(f"  {ms:8.1f} ms  {name}")
+
+    checks = [
+        ("cold start (first run)", result['cold_ms'], args.max_cold_ms),
+        ("login page rerun", result['login_rerun_ms'], args.max_login_rerun_ms),
+        ("browse page rerun", result['browse_rerun_ms'], args.max_browse_rerun_ms),
+    ]
+    failed = False
+    print()
+    for label, value, budget in checks:
+        ok = value <= budget
+        failed |= not ok
+        print(f"{'ok  ' if ok else 'FAIL'} {label:<24}{value:8.1f} ms  (budget {budget:.0f} ms)")
+
+    heavy = result['heavy_modules_loaded']
+    failed |= bool(heavy)
+    print(f"{'FAIL' if heavy else 'ok  '} heavy modules loaded by login/browse: {', '.join(heavy) or 'none'}")
+    sys.exit(1 if failed else 0)
@@ -0,0 +1,114 @@
+import sqlite3
+import threading
+from collections import OrderedDict
+
+
+class LRUCache:
+    """Thread-safe, bounded least-recently-used cache"""
+
+    def __init__(self, max_size=1024):
+        self.max_size = max_size
+        # Last seen value of the change counter this cache mirrors, if any
+        self.source_version = None
+        # Bumped by every invalidation; a value read before one must not be cached after it
+        self.generation = 0
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key, default=None):
+        with self._lock:
+            if key not in self._data:
+                return default
+            self._data.move_to_end(key)
+            return self._data[key]
+
+    def set(self, key, value, generation=None):
+        """
+        Cache value under key; with generation (read before fetching the value), the value
+        is dropped if the cache was invalidated since, as it may predate that change
+        """
+        with self._lock:
+            if generation is not None and generation != self.generation:
+                return
+            self._data[key] = value
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_size:
+                self._data.popitem(last=False)
+
+    def pop(self, key):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def invalidate(self, *keys):
+        """Drop keys after their source rows changed, and fence off values read before that"""
+        with self._lock:
+            for key in keys:
+                self._data.pop(key, None)
+            self.generation += 1
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+            self.generation += 1
+
+    def __len__(self):
+        return len(self._data)
+
+
+class ChangeTracker:
+    """
+    Detects commits made to a database file by any other connection,
+    including other app processes, using PRAGMA data_version
+    """
+
+    def __init__(self, db_name):
+        # One long-lived connection per process: data_version is only comparable on the same connection
+        self._conn = sqlite3.connect(db_name, check_same_thread=False)
+        self._lock = threading.Lock()
+        self._callbacks = {}
+        self._version = self._read_version()
+        self.generation = 0
+
+    def _read_version(self):
+        return self._conn.execute('PRAGMA data_version').fetchone()[0]
+
+    def register(self, name, callback):
+        """Call callback() whenever the database has changed since the last check (one per name)"""
+        with self._lock:
+            self._callbacks[name] = callback
+
+    def check(self):
+        """Invalidate registered caches if anything was committed since the last check"""
+        with self._lock:
+            version = self._read_version()
+            if version == self._version:
+                return False
+            self._version = version
+            self.generation += 1
+            callbacks = list(self._callbacks.values())
+
+        for callback in callbacks:
+            callback()
+        return True
+
+
+_trackers = {}
+_registry_lock = threading.Lock()
+_caches = {}
+
+
+def get_change_tracker(db_name):
+    """Return the process-wide change tracker for a database file"""
+    with _registry_lock:
+        if db_name not in _trackers:
+            _trackers[db_name] = ChangeTracker(db_name)
+        return _trackers[db_name]
+
+
+def get_cache(db_name, name, max_size=1024):
+    """Return a process-wide LRU cache for a database file, shared across reruns"""
+    with _registry_lock:
+        key = (db_name, name)
+        if key not in _caches:
+            _caches[key] = LRUCache(max_size)
+        return _caches[key]
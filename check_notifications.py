@@ -0,0 +1,134 @@
+import argparse
+import os
+import socketserver
+import sys
+import tempfile
+import threading
+from email import message_from_bytes
+from email.policy import default
+
+from database import Database
+from notifications import DELETED_ITEM, dispatch_pending
+
+SENDER = "lostfound@campus.edu"
+
+
+class SMTPSink(socketserver.ThreadingTCPServer):
+    """Minimal local SMTP server that keeps every email it accepts, for checking digests offline"""
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self, address):
+        super().__init__(address, SMTPSinkHandler)
+        self.received = []
+
+
+class SMTPSinkHandler(socketserver.StreamRequestHandler):
+    def reply(self, line):
+        self.wfile.write(f"{line}\r\n".encode())
+
+    def handle(self):
+        self.reply("220 localhost SMTP sink")
+        recipients = []
+        while True:
+            line = self.rfile.readline()
+            if not line:
+                return
+            command = line.decode().strip().split(' ', 1)[0].upper()
+            if command in ('EHLO', 'HELO'):
+                self.reply("250 localhost")
+            elif command == 'MAIL':
+                recipients = []
+                self.reply("250 OK")
+            elif command == 'RCPT':
+                recipients.append(line.decode().split(':', 1)[1].strip().strip('<>'))
+                self.reply("250 OK")
+            elif command == 'DATA':
+                self.reply("354 End data with <CR><LF>.<CR><LF>")
+                data = []
+                for data_line in iter(self.rfile.readline, b''):
+                    if data_line == b'.\r\n':
+                        break
+                    # Undo SMTP dot-stuffing
+                    data.append(data_line[1:] if data_line.startswith(b'..') else data_line)
+                self.server.received.append((recipients, message_from_bytes(b''.join(data), policy=default)))
+                self.reply("250 OK")
+            elif command == 'QUIT':
+                self.reply("221 Bye")
+                return
+            else:
+                self.reply("250 OK")
+
+
+def check_notifications(args):
+    """
+    Queue messages and matches in a fresh database, dispatch them to a local SMTP sink and check
+    that each user got one digest and that every outbox row was marked sent
+    Returns True if every check passed
+    """
+    path = args.db or os.path.join(tempfile.mkdtemp(prefix='spm-notify-'), 'notify.db')
+    db = Database(path)
+    db.create_user("alice", "not-a-real-hash", 'student', "alice@campus.edu")
+    db.create_user("bob", "not-a-real-hash", 'student', "bob@campus.edu")
+    alice = db.get_user_by_username("alice")['id']
+    bob = db.get_user_by_username("bob")['id']
+
+    description = "black leather wallet with a student id card, left on a desk in the library"
+    wallet = db.create_item("Black leather wallet", description, 'lost', None, alice)
+    db.create_message(bob, alice, wallet, "I think I saw your wallet at the front desk")
+    db.create_message(bob, alice, wallet, "It's still there if you want it")
+    db.create_item("Black leather wallet", description, 'found', None, bob)
+    db.create_message(alice, bob, wallet, "Thanks, on my way!")
+
+    # A match whose found item is deleted before the digest goes out
+    description = "blue steel water bottle with stickers, left in lecture hall b after class"
+    db.create_item("Blue water bottle", description, 'lost', None, alice)
+    db.delete_item(db.create_item("Blue water bottle", description, 'found', None, bob))
+
+    conn = db.get_connection()
+    queued = conn.execute('SELECT COUNT(*) FROM notification_outbox').fetchone()[0]
+    conn.close()
+
+    sink = SMTPSink(('127.0.0.1', args.port))
+    threading.Thread(target=sink.serve_forever, name="smtp-sink", daemon=True).start()
+    try:
+        emails, events = dispatch_pending(db, SENDER, host='127.0.0.1', port=sink.server_address[1])
+    finally:
+        sink.shutdown()
+        sink.server_close()
+
+    conn = db.get_connection()
+    unsent = conn.execute('SELECT COUNT(*) FROM notification_outbox WHERE sent_at IS NULL').fetchone()[0]
+    conn.close()
+
+    digests = {recipients[0]: email for recipients, email in sink.received}
+    bodies = {recipient: email.get_content() for recipient, email in digests.items()}
+    alice_body = bodies.get('alice@campus.edu', "")
+    for recipient, email in sorted(digests.items()):
+        print(f"--- {recipient}: {email['Subject']}\n{email.get_content().strip()}\n")
+
+    checks = [
+        (f"{queued} events queued (3 messages, 2 matches)", queued == 5),
+        (f"{emails} digests sent and {len(sink.received)} received (one per user)", emails == len(sink.received) == 2),
+        (f"{events} events dispatched", events == queued),
+        (f"{unsent} outbox rows left unsent", unsent == 0),
+        ("alice's digest lists both messages and the match",
+         alice_body.count("sent you a message") == 2 and "looks like your lost \"Black leather wallet\"" in alice_body),
+        ("a match on a deleted item names it as such",
+         DELETED_ITEM in alice_body and "None" not in alice_body),
+        ("bob's digest has alice's reply", "Thanks, on my way!" in bodies.get('bob@campus.edu', "")),
+    ]
+    for label, passed in checks:
+        print(f"{'ok  ' if passed else 'FAIL'} {label}")
+    return all(passed for _, passed in checks)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Send notification digests to a local SMTP sink and check they were delivered and marked sent"
+    )
+    parser.add_argument("--port", type=int, default=0, help="Port for the SMTP sink (default: any free port)")
+    parser.add_argument("--db", help="Database file to use (default: a fresh temporary file)")
+    args = parser.parse_args()
+
+    sys.exit(0 if check_notifications(args) else 1)
@@ -1,15 +1,75 @@
 
 import sqlite3
+import concurrent.futures
 import hashlib
+import heapq
+import math
 import os
+import time
 from datetime import datetime
+import near_duplicates
+from models import AdminItemRow, ItemCard, MessageRow, MyItemRow, NearbyItemCard
+from cache import get_cache, get_change_tracker
+from write_queue import get_lock_wait_stats, get_write_queue
+
+# Columns copied verbatim between the hot tables and their archive counterparts
+ITEM_COLUMNS = (
+    'id, title, description, item_type, image_url, status, user_id, created_at, updated_at, '
+    'latitude, longitude, building_id, version, resolved_at'
+)
+MESSAGE_COLUMNS = 'id, sender_id, receiver_id, item_id, message, is_read, created_at'
+ITEM_IMAGE_COLUMNS = 'id, item_id, image_url, position, created_at'
+
+METERS_PER_DEGREE = 111320
+
+# Whole hours from report to resolution
+RESOLUTION_HOURS = "CAST(MAX(julianday({row}.resolved_at) - julianday({row}.created_at), 0) * 24 AS INTEGER)"
+
+DEFAULT_SYNONYMS = [
+    ('airpod', 'airpods'), ('air pods', 'airpods'), ('air pod', 'airpods'),
+    ('earbuds', 'airpods'), ('earbud', 'airpods'), ('ear buds', 'airpods'),
+    ('earphone', 'earphones'), ('headphone', 'headphones'), ('headset', 'headphones'),
+    ('cellphone', 'phone'), ('cell phone', 'phone'), ('mobile', 'phone'), ('iphone', 'phone'),
+    ('specs', 'glasses'), ('spectacles', 'glasses'), ('sunglasses', 'glasses'),
+    ('purse', 'wallet'), ('key', 'keys'), ('keychain', 'keys'), ('car keys', 'keys'),
+    ('student id', 'id card'), ('matric card', 'id card'),
+    ('flash drive', 'usb'), ('thumb drive', 'usb'), ('pendrive', 'usb'), ('flashdrive', 'usb'),
+    ('macbook', 'laptop'), ('notebook computer', 'laptop'),
+    ('water bottle', 'bottle'), ('flask', 'bottle'),
+    ('backpack', 'bag'), ('rucksack', 'bag'), ('handbag', 'bag'),
+]
+
+def haversine_m(lat1, lon1, lat2, lon2):
+    """Great-circle distance between two points in metres"""
+    phi1, phi2 = math.radians(lat1), math.radians(lat2)
+    d_phi = phi2 - phi1
+    d_lambda = math.radians(lon2 - lon1)
+    a = math.sin(d_phi / 2) ** 2 + math.cos(phi1) * math.cos(phi2) * math.sin(d_lambda / 2) ** 2
+    return 2 * 6371000 * math.asin(math.sqrt(a))
 
 class Database:
-    def __init__(self, db_name="database/campus_lost_found.db"):
+    def __init__(self, db_name="database/campus_lost_found.db", use_write_queue=False, multi_process=False):
         self.db_name = db_name
+        # Cold tier for resolved items and old messages, attached on demand
+        self.archive_name = db_name.rsplit('.', 1)[0] + '_archive.db'
+        # Several app processes share the file: use WAL and wait longer on the write lock
+        self.multi_process = multi_process
+        self.busy_timeout = 30 if multi_process else 5
         self.init_db()
+        self.change_tracker = get_change_tracker(db_name)
+        # Users keyed by ('id', id) and ('username', name); dropped when the users counter moves
+        self.user_cache = get_cache(db_name, 'users')
+        self.change_tracker.register('users', self._sync_user_cache)
+        self.lock_waits = get_lock_wait_stats(db_name)
+        # Optional single-writer path: all mutations are group-committed by one thread
+        # The writer's connection has the archive attached, for archival and rollup rebuilds
+        self.write_queue = get_write_queue(
+            db_name, lambda: self.get_connection(attach_archive=True)
+        ) if use_write_queue else None
+        # How long a caller waits for a queued write before giving up on it
+        self.write_timeout = self.busy_timeout * 4
     
-    def get_connection(self):
+    def get_connection(self, attach_archive=False):
         if not os.path.exists(self.db_name):
             parts = self.db_name.rsplit('/', 1)
             path = parts[0]
@@ -18,8 +78,13 @@ class Database:
             with open(os.path.join(path,file), 'w') as fp:
                 pass
         """Create and return a database connection"""
-        conn = sqlite3.connect(self.db_name)
+        conn = sqlite3.connect(self.db_name, timeout=self.busy_timeout)
         conn.row_factory = sqlite3.Row
+        if self.multi_process:
+            # Per-connection setting: in WAL mode NORMAL is still safe and skips an fsync per commit
+            conn.execute('PRAGMA synchronous = NORMAL')
+        if attach_archive:
+            conn.execute('ATTACH DATABASE ? AS archive', (self.archive_name,))
         return conn
     
     def init_db(self):
@@ -27,6 +92,14 @@ class Database:
         conn = self.get_connection()
         cursor = conn.cursor()
         
+        # Only takes effect on a new, empty file; older files need one full VACUUM (see maintenance.py)
+        # Must come first: switching to WAL writes the header and fixes auto_vacuum at NONE
+        cursor.execute('PRAGMA auto_vacuum = INCREMENTAL')
+        
+        if self.multi_process:
+            # WAL lets readers in every process run alongside the single writer
+            cursor.execute('PRAGMA journal_mode = WAL')
+        
         # Users table
         cursor.execute('''
             CREATE TABLE IF NOT EXISTS users (
@@ -71,6 +144,381 @@ class Database:
             )
         ''')
         
+        # Campus gazetteer: named buildings with their coordinates
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS buildings (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                name TEXT UNIQUE NOT NULL,
+                latitude REAL NOT NULL,
+                longitude REAL NOT NULL
+            )
+        ''')
+        
+        # Where an item was lost/found (columns added to databases created before locations)
+        self._add_column(cursor, 'items', 'latitude', 'REAL')
+        self._add_column(cursor, 'items', 'longitude', 'REAL')
+        self._add_column(cursor, 'items', 'building_id', 'INTEGER REFERENCES buildings (id)')
+        # Bumped by every update, for optimistic concurrency control
+        self._add_column(cursor, 'items', 'version', 'INTEGER NOT NULL DEFAULT 1')
+        # When the item was last marked resolved (set by update_item); later edits leave it alone
+        added_resolved_at = self._add_column(cursor, 'items', 'resolved_at', 'TIMESTAMP')
+        if added_resolved_at:
+            cursor.execute("UPDATE items SET resolved_at = updated_at WHERE status = 'resolved'")
+        
+        # R*Tree over item coordinates, kept in sync with items by triggers
+        has_location_index = cursor.execute(
+            "SELECT 1 FROM sqlite_master WHERE name = 'items_location'"
+        ).fetchone()
+        cursor.execute('''
+            CREATE VIRTUAL TABLE IF NOT EXISTS items_location
+            USING rtree(id, min_lat, max_lat, min_lon, max_lon)
+        ''')
+        if not has_location_index:
+            cursor.execute('''
+                INSERT INTO items_location
+                SELECT id, latitude, latitude, longitude, longitude FROM items
+                WHERE latitude IS NOT NULL AND longitude IS NOT NULL
+            ''')
+        cursor.execute('''
+            CREATE TRIGGER IF NOT EXISTS items_location_insert AFTER INSERT ON items
+            WHEN NEW.latitude IS NOT NULL AND NEW.longitude IS NOT NULL
+            BEGIN
+                INSERT INTO items_location VALUES (NEW.id, NEW.latitude, NEW.latitude, NEW.longitude, NEW.longitude);
+            END
+        ''')
+        cursor.execute('''
+            CREATE TRIGGER IF NOT EXISTS items_location_update AFTER UPDATE OF latitude, longitude ON items
+            BEGIN
+                DELETE FROM items_location WHERE id = OLD.id;
+                INSERT INTO items_location
+                SELECT NEW.id, NEW.latitude, NEW.latitude, NEW.longitude, NEW.longitude
+                WHERE NEW.latitude IS NOT NULL AND NEW.longitude IS NOT NULL;
+            END
+        ''')
+        cursor.execute('''
+            CREATE TRIGGER IF NOT EXISTS items_location_delete AFTER DELETE ON items
+            BEGIN
+                DELETE FROM items_location WHERE id = OLD.id;
+            END
+        ''')
+        
+        # Item photos in display order; position 0 mirrors items.image_url
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS item_images (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                item_id INTEGER NOT NULL,
+                image_url TEXT NOT NULL,
+                position INTEGER NOT NULL DEFAULT 0,
+                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                FOREIGN KEY (item_id) REFERENCES items (id)
+            )
+        ''')
+        cursor.execute('CREATE INDEX IF NOT EXISTS idx_item_images_item ON item_images (item_id, position)')
+        
+        # MinHash signatures and LSH band buckets for near-duplicate detection (see near_duplicates.py)
+        has_minhash_index = cursor.execute(
+            "SELECT 1 FROM sqlite_master WHERE name = 'item_minhash'"
+        ).fetchone()
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS item_minhash (
+                item_id INTEGER PRIMARY KEY,
+                signature BLOB NOT NULL
+            )
+        ''')
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS item_lsh (
+                band INTEGER NOT NULL,
+                bucket INTEGER NOT NULL,
+                item_id INTEGER NOT NULL
+            )
+        ''')
+        cursor.execute('CREATE INDEX IF NOT EXISTS idx_item_lsh_bucket ON item_lsh (band, bucket)')
+        cursor.execute('CREATE INDEX IF NOT EXISTS idx_item_lsh_item ON item_lsh (item_id)')
+        cursor.execute('''
+            CREATE TRIGGER IF NOT EXISTS items_minhash_delete AFTER DELETE ON items
+            BEGIN
+                DELETE FROM item_minhash WHERE item_id = OLD.id;
+                DELETE FROM item_lsh WHERE item_id = OLD.id;
+            END
+        ''')
+        if not has_minhash_index:
+            for item in cursor.execute('SELECT id, title, description FROM items').fetchall():
+                sig = near_duplicates.signature(near_duplicates.item_text(item['title'], item['description']))
+                self._index_item_text(cursor, item['id'], sig)
+        
+        # Content hash -> hosted URL, so identical photos aren't uploaded twice
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS image_uploads (
+                content_hash TEXT PRIMARY KEY,
+                image_url TEXT NOT NULL,
+                uploaded_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                expires_at TIMESTAMP
+            )
+        ''')
+        
+        # Per-table change counters, bumped by triggers, so caches can tell which table changed
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS change_counters (
+                name TEXT PRIMARY KEY,
+                version INTEGER NOT NULL DEFAULT 0
+            )
+        ''')
+        cursor.execute("INSERT OR IGNORE INTO change_counters (name) VALUES ('users')")
+        for event in ('INSERT', 'UPDATE', 'DELETE'):
+            cursor.execute(f'''
+                CREATE TRIGGER IF NOT EXISTS users_changed_{event.lower()} AFTER {event} ON users
+                BEGIN
+                    UPDATE change_counters SET version = version + 1 WHERE name = 'users';
+                END
+            ''')
+        
+        # Append-only log of changed item ids, so in-memory indexes can catch up incrementally
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS item_changes (
+                seq INTEGER PRIMARY KEY AUTOINCREMENT,
+                item_id INTEGER NOT NULL,
+                changed_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            )
+        ''')
+        for event, row in (('INSERT', 'NEW'), ('UPDATE', 'NEW'), ('DELETE', 'OLD')):
+            cursor.execute(f'''
+                CREATE TRIGGER IF NOT EXISTS items_changed_{event.lower()} AFTER {event} ON items
+                BEGIN
+                    INSERT INTO item_changes (item_id) VALUES ({row}.id);
+                END
+            ''')
+        
+        # Search synonyms for common campus items: alias -> canonical term
+        has_synonyms = cursor.execute(
+            "SELECT 1 FROM sqlite_master WHERE name = 'search_synonyms'"
+        ).fetchone()
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS search_synonyms (
+                alias TEXT PRIMARY KEY,
+                canonical TEXT NOT NULL
+            )
+        ''')
+        if not has_synonyms:
+            cursor.executemany(
+                'INSERT INTO search_synonyms (alias, canonical) VALUES (?, ?)',
+                DEFAULT_SYNONYMS
+            )
+        
+        # Daily analytics rollups, kept current by triggers so charts never scan raw rows
+        has_rollups = cursor.execute(
+            "SELECT 1 FROM sqlite_master WHERE name = 'daily_item_rollups'"
+        ).fetchone()
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS daily_item_rollups (
+                day TEXT NOT NULL,
+                item_type TEXT NOT NULL,
+                reported INTEGER NOT NULL DEFAULT 0,
+                resolved INTEGER NOT NULL DEFAULT 0,
+                PRIMARY KEY (day, item_type)
+            )
+        ''')
+        # Histogram of whole hours from report to resolution, per resolution day, for medians
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS daily_resolution_hours (
+                day TEXT NOT NULL,
+                item_type TEXT NOT NULL,
+                hours INTEGER NOT NULL,
+                items INTEGER NOT NULL DEFAULT 0,
+                PRIMARY KEY (day, item_type, hours)
+            )
+        ''')
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS daily_message_rollups (
+                day TEXT PRIMARY KEY,
+                messages INTEGER NOT NULL DEFAULT 0
+            )
+        ''')
+        cursor.execute('''
+            CREATE TRIGGER IF NOT EXISTS items_rollup_insert AFTER INSERT ON items
+            BEGIN
+                INSERT INTO daily_item_rollups (day, item_type, reported)
+                VALUES (date(NEW.created_at), NEW.item_type, 1)
+                ON CONFLICT (day, item_type) DO UPDATE SET reported = reported + 1;
+            END
+        ''')
+        cursor.execute(f'''
+            CREATE TRIGGER IF NOT EXISTS items_rollup_resolve AFTER UPDATE OF status ON items
+            WHEN NEW.status = 'resolved' AND OLD.status != 'resolved'
+            BEGIN
+                INSERT INTO daily_item_rollups (day, item_type, resolved)
+                VALUES (date(NEW.resolved_at), NEW.item_type, 1)
+                ON CONFLICT (day, item_type) DO UPDATE SET resolved = resolved + 1;
+                INSERT INTO daily_resolution_hours (day, item_type, hours, items)
+                VALUES (date(NEW.resolved_at), NEW.item_type, {RESOLUTION_HOURS.format(row='NEW')}, 1)
+                ON CONFLICT (day, item_type, hours) DO UPDATE SET items = items + 1;
+            END
+        ''')
+        # Re-opening a resolved item takes back the resolution it was counted under
+        cursor.execute(f'''
+            CREATE TRIGGER IF NOT EXISTS items_rollup_reopen AFTER UPDATE OF status ON items
+            WHEN OLD.status = 'resolved' AND NEW.status != 'resolved'
+            BEGIN
+                UPDATE daily_item_rollups SET resolved = resolved - 1
+                WHERE day = date(OLD.resolved_at) AND item_type = OLD.item_type;
+                UPDATE daily_resolution_hours SET items = items - 1
+                WHERE day = date(OLD.resolved_at) AND item_type = OLD.item_type
+                  AND hours = {RESOLUTION_HOURS.format(row='OLD')};
+            END
+        ''')
+        cursor.execute('''
+            CREATE TRIGGER IF NOT EXISTS messages_rollup_insert AFTER INSERT ON messages
+            BEGIN
+                INSERT INTO daily_message_rollups (day, messages)
+                VALUES (date(NEW.created_at), 1)
+                ON CONFLICT (day) DO UPDATE SET messages = messages + 1;
+            END
+        ''')
+        
+        # Unread messages per receiver, kept current by triggers for the sidebar badge
+        has_unread_counts = cursor.execute(
+            "SELECT 1 FROM sqlite_master WHERE name = 'unread_counts'"
+        ).fetchone()
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS unread_counts (
+                user_id INTEGER PRIMARY KEY,
+                unread INTEGER NOT NULL DEFAULT 0
+            )
+        ''')
+        if not has_unread_counts:
+            cursor.execute('''
+                INSERT INTO unread_counts (user_id, unread)
+                SELECT receiver_id, COUNT(*) FROM messages WHERE NOT is_read GROUP BY receiver_id
+            ''')
+        cursor.execute('''
+            CREATE TRIGGER IF NOT EXISTS messages_unread_insert AFTER INSERT ON messages
+            WHEN NOT NEW.is_read
+            BEGIN
+                INSERT INTO unread_counts (user_id, unread) VALUES (NEW.receiver_id, 1)
+                ON CONFLICT (user_id) DO UPDATE SET unread = unread + 1;
+            END
+        ''')
+        cursor.execute('''
+            CREATE TRIGGER IF NOT EXISTS messages_unread_read AFTER UPDATE OF is_read ON messages
+            WHEN NOT OLD.is_read AND NEW.is_read
+            BEGIN
+                UPDATE unread_counts SET unread = unread - 1 WHERE user_id = OLD.receiver_id;
+            END
+        ''')
+        cursor.execute('''
+            CREATE TRIGGER IF NOT EXISTS messages_unread_unread AFTER UPDATE OF is_read ON messages
+            WHEN OLD.is_read AND NOT NEW.is_read
+            BEGIN
+                INSERT INTO unread_counts (user_id, unread) VALUES (NEW.receiver_id, 1)
+                ON CONFLICT (user_id) DO UPDATE SET unread = unread + 1;
+            END
+        ''')
+        # Deletes include messages moved to the archive; those stop counting too
+        cursor.execute('''
+            CREATE TRIGGER IF NOT EXISTS messages_unread_delete AFTER DELETE ON messages
+            WHEN NOT OLD.is_read
+            BEGIN
+                UPDATE unread_counts SET unread = unread - 1 WHERE user_id = OLD.receiver_id;
+            END
+        ''')
+        
+        # Transactional outbox for email digests (see notifications.py); rows are written in the
+        # same transaction as the message or item that caused them
+        # kind 'message': ref_id is the message; kind 'match': item_id is the user's lost item and
+        # ref_id the found item that looks like it
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS notification_outbox (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                user_id INTEGER NOT NULL,
+                kind TEXT NOT NULL CHECK(kind IN ('message', 'match')),
+                item_id INTEGER,
+                ref_id INTEGER,
+                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                claimed_at TIMESTAMP,
+                sent_at TIMESTAMP,
+                FOREIGN KEY (user_id) REFERENCES users (id)
+            )
+        ''')
+        cursor.execute(
+            'CREATE INDEX IF NOT EXISTS idx_notification_outbox_pending ON notification_outbox (id) '
+            'WHERE sent_at IS NULL'
+        )
+
+        # Maintenance runs (see maintenance.py)
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS maintenance_runs (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                started_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                duration_ms REAL,
+                status TEXT NOT NULL DEFAULT 'running',
+                details TEXT
+            )
+        ''')
+        
+        # Indexes used by the archival scans
+        cursor.execute('CREATE INDEX IF NOT EXISTS idx_items_status_updated ON items (status, updated_at)')
+        # Index for filtered, newest-first listings (API pagination)
+        cursor.execute('CREATE INDEX IF NOT EXISTS idx_items_status_type_created ON items (status, item_type, created_at)')
+        cursor.execute('CREATE INDEX IF NOT EXISTS idx_messages_created ON messages (created_at)')
+        
+        # Archive tables mirror items/messages without constraints, plus when they were moved
+        cursor.execute('ATTACH DATABASE ? AS archive', (self.archive_name,))
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS archive.items (
+                id INTEGER PRIMARY KEY,
+                title TEXT NOT NULL,
+                description TEXT,
+                item_type TEXT NOT NULL,
+                image_url TEXT,
+                status TEXT,
+                user_id INTEGER NOT NULL,
+                created_at TIMESTAMP,
+                updated_at TIMESTAMP,
+                latitude REAL,
+                longitude REAL,
+                building_id INTEGER,
+                version INTEGER,
+                resolved_at TIMESTAMP,
+                archived_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            )
+        ''')
+        self._add_column(cursor, 'items', 'latitude', 'REAL', schema='archive')
+        self._add_column(cursor, 'items', 'longitude', 'REAL', schema='archive')
+        self._add_column(cursor, 'items', 'building_id', 'INTEGER', schema='archive')
+        self._add_column(cursor, 'items', 'version', 'INTEGER', schema='archive')
+        if self._add_column(cursor, 'items', 'resolved_at', 'TIMESTAMP', schema='archive'):
+            cursor.execute("UPDATE archive.items SET resolved_at = updated_at WHERE status = 'resolved'")
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS archive.messages (
+                id INTEGER PRIMARY KEY,
+                sender_id INTEGER NOT NULL,
+                receiver_id INTEGER NOT NULL,
+                item_id INTEGER,
+                message TEXT NOT NULL,
+                is_read BOOLEAN,
+                created_at TIMESTAMP,
+                archived_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            )
+        ''')
+        # Photos of archived items move with them
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS archive.item_images (
+                id INTEGER PRIMARY KEY,
+                item_id INTEGER NOT NULL,
+                image_url TEXT NOT NULL,
+                position INTEGER,
+                created_at TIMESTAMP
+            )
+        ''')
+        cursor.execute('CREATE INDEX IF NOT EXISTS archive.idx_archive_items_user ON items (user_id)')
+        cursor.execute('CREATE INDEX IF NOT EXISTS archive.idx_archive_item_images_item ON item_images (item_id)')
+        cursor.execute('CREATE INDEX IF NOT EXISTS archive.idx_archive_messages_sender ON messages (sender_id)')
+        cursor.execute('CREATE INDEX IF NOT EXISTS archive.idx_archive_messages_receiver ON messages (receiver_id)')
+        # Rollups keyed on updated_at before resolved_at existed are recomputed once
+        if not has_rollups or added_resolved_at:
+            self._rebuild_rollups(cursor)
+        conn.commit()
+        cursor.execute('DETACH DATABASE archive')
+        
         # Create default admin user if not exists
         cursor.execute('''
             INSERT OR IGNORE INTO users (username, password_hash, role, email)
@@ -80,65 +528,241 @@ class Database:
         conn.commit()
         conn.close()
     
+    def _add_column(self, cursor, table, column, definition, schema='main'):
+        """Add a column to an existing table if an older schema doesn't have it yet"""
+        columns = [row[1] for row in cursor.execute(f'PRAGMA {schema}.table_info({table})')]
+        if column in columns:
+            return False
+        cursor.execute(f'ALTER TABLE {schema}.{table} ADD COLUMN {column} {definition}')
+        return True
+    
+    def sync_changes(self):
+        """
+        Check once per rerun whether this or another process committed changes
+        and, if so, invalidate process-local caches registered with the tracker
+        """
+        return self.change_tracker.check()
+    
+    def _sync_user_cache(self):
+        """Drop cached users if the users table changed in this or another process"""
+        conn = self.get_connection()
+        version = conn.execute("SELECT version FROM change_counters WHERE name = 'users'").fetchone()[0]
+        conn.close()
+        if version != self.user_cache.source_version:
+            self.user_cache.clear()
+            self.user_cache.source_version = version
+    
+    def _cache_user(self, user, generation):
+        """Cache a user row that was read while the cache was at generation"""
+        if user:
+            self.user_cache.set(('id', user['id']), user, generation)
+            self.user_cache.set(('username', user['username']), user, generation)
+        return user
+    
+    def _invalidate_user(self, user_id=None, username=None):
+        """Drop a user's cache entries once a write to their row has committed"""
+        keys = []
+        for key in (('id', user_id), ('username', username)):
+            if key[1] is not None:
+                keys.append(key)
+                cached = self.user_cache.get(key)
+                if cached:
+                    keys += [('id', cached['id']), ('username', cached['username'])]
+        self.user_cache.invalidate(*keys)
+    
+    def _index_item_text(self, cursor, item_id, sig):
+        """Store an item's MinHash signature and LSH buckets"""
+        cursor.execute(
+            'INSERT OR REPLACE INTO item_minhash (item_id, signature) VALUES (?, ?)',
+            (item_id, near_duplicates.to_blob(sig))
+        )
+        cursor.execute('DELETE FROM item_lsh WHERE item_id = ?', (item_id,))
+        cursor.executemany(
+            'INSERT INTO item_lsh (band, bucket, item_id) VALUES (?, ?, ?)',
+            [(band, bucket, item_id) for band, bucket in near_duplicates.band_buckets(sig)]
+        )
+    
+    def _execute_write(self, operation, attach_archive=False):
+        """
+        Run operation(cursor) in a write transaction and return its result
+        attach_archive makes the archive schema available to the operation
+        """
+        if self.write_queue:
+            future = self.write_queue.submit(operation)
+            try:
+                return future.result(timeout=self.write_timeout)
+            except concurrent.futures.TimeoutError:
+                # Withdraw the write if the writer hasn't started it, so it can't land after we report failure
+                future.cancel()
+                raise
+        
+        conn = self.get_connection(attach_archive=attach_archive)
+        try:
+            # Take the write lock up front, so the time spent waiting for it can be measured
+            started = time.perf_counter()
+            conn.execute('BEGIN IMMEDIATE')
+            self.lock_waits.record(time.perf_counter() - started)
+            result = operation(conn.cursor())
+            conn.commit()
+            return result
+        finally:
+            conn.close()
+    
     # User CRUD operations
     def create_user(self, username, password_hash, role, email):
         """Create a new user"""
-        conn = self.get_connection()
-        cursor = conn.cursor()
-        try:
+        def insert(cursor):
             cursor.execute('''
                 INSERT INTO users (username, password_hash, role, email)
                 VALUES (?, ?, ?, ?)
             ''', (username, password_hash, role, email))
-            conn.commit()
+        
+        try:
+            self._execute_write(insert)
             return True
         except sqlite3.IntegrityError:
             return False
         finally:
-            conn.close()
+            self._invalidate_user(username=username)
     
     def get_user_by_username(self, username):
         """Get user by username"""
+        cached = self.user_cache.get(('username', username))
+        if cached:
+            return cached
+        
+        generation = self.user_cache.generation
         conn = self.get_connection()
         cursor = conn.cursor()
         cursor.execute('SELECT * FROM users WHERE username = ?', (username,))
         user = cursor.fetchone()
         conn.close()
-        return user
+        return self._cache_user(user, generation)
     
     def get_user_by_id(self, user_id):
         """Get user by ID"""
+        cached = self.user_cache.get(('id', user_id))
+        if cached:
+            return cached
+        
+        generation = self.user_cache.generation
         conn = self.get_connection()
         cursor = conn.cursor()
         cursor.execute('SELECT * FROM users WHERE id = ?', (user_id,))
         user = cursor.fetchone()
         conn.close()
-        return user
+        return self._cache_user(user, generation)
+    
+    def update_password_hash(self, user_id, password_hash):
+        """Replace a user's stored password hash (used when upgrading the KDF)"""
+        def update(cursor):
+            cursor.execute('UPDATE users SET password_hash = ? WHERE id = ?', (password_hash, user_id))
+        
+        self._execute_write(update)
+        self._invalidate_user(user_id=user_id)
+    
+    def get_usernames(self, user_ids):
+        """Batch-resolve user IDs to usernames, returns {user_id: username}"""
+        usernames = {}
+        missing = []
+        for user_id in set(user_ids):
+            cached = self.user_cache.get(('id', user_id))
+            if cached:
+                usernames[user_id] = cached['username']
+            else:
+                missing.append(user_id)
+        
+        if missing:
+            generation = self.user_cache.generation
+            conn = self.get_connection()
+            cursor = conn.cursor()
+            placeholders = ', '.join('?' * len(missing))
+            cursor.execute(f'SELECT * FROM users WHERE id IN ({placeholders})', missing)
+            for user in cursor.fetchall():
+                self._cache_user(user, generation)
+                usernames[user['id']] = user['username']
+            conn.close()
+        return usernames
     
     # Item CRUD operations
-    def create_item(self, title, description, item_type, image_url, user_id):
-        """Create a new lost/found item"""
-        conn = self.get_connection()
-        cursor = conn.cursor()
-        cursor.execute('''
-            INSERT INTO items (title, description, item_type, image_url, user_id)
-            VALUES (?, ?, ?, ?, ?)
-        ''', (title, description, item_type, image_url, user_id))
-        conn.commit()
-        item_id = cursor.lastrowid
-        conn.close()
-        return item_id
+    def create_item(self, title, description, item_type, image_url, user_id, image_urls=None,
+                    latitude=None, longitude=None, building_id=None):
+        """
+        Create a new lost/found item
+        image_urls optionally lists all photos in display order; the first is the primary image
+        Without explicit coordinates, an item placed in a building takes the building's location
+        """
+        if image_urls and not image_url:
+            image_url = image_urls[0]
+        
+        if building_id and latitude is None:
+            building = self.get_building(building_id)
+            if building:
+                latitude, longitude = building['latitude'], building['longitude']
+        
+        # Signature is computed before the write so the writer holds the lock only for the inserts
+        sig = near_duplicates.signature(near_duplicates.item_text(title, description))
+        
+        # Owners of lost items this found item looks like are notified (see notifications.py)
+        match_owners = []
+        if item_type == 'found':
+            match_owners = [
+                (match['user_id'], match['id'])
+                for match in self.find_near_duplicates(title, description, 'lost')
+                if match['user_id'] != user_id
+            ]
+        
+        def insert(cursor):
+            cursor.execute('''
+                INSERT INTO items (title, description, item_type, image_url, user_id, latitude, longitude, building_id)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+            ''', (title, description, item_type, image_url, user_id, latitude, longitude, building_id))
+            item_id = cursor.lastrowid
+            self._index_item_text(cursor, item_id, sig)
+            if image_urls:
+                cursor.executemany(
+                    'INSERT INTO item_images (item_id, image_url, position) VALUES (?, ?, ?)',
+                    [(item_id, url, position) for position, url in enumerate(image_urls)]
+                )
+            if match_owners:
+                cursor.executemany('''
+                    INSERT INTO notification_outbox (user_id, kind, item_id, ref_id)
+                    VALUES (?, 'match', ?, ?)
+                ''', [(owner_id, lost_id, item_id) for owner_id, lost_id in match_owners])
+            return item_id
+        
+        return self._execute_write(insert)
+    
+    def _items_source(self, include_archive):
+        """Table expression for items, optionally including the archive tier"""
+        if not include_archive:
+            return 'items'
+        return f'''(
+            SELECT {ITEM_COLUMNS}, NULL AS archived_at FROM items
+            UNION ALL
+            SELECT {ITEM_COLUMNS}, archived_at FROM archive.items
+        )'''
+    
+    def _messages_source(self, include_archive):
+        """Table expression for messages, optionally including the archive tier"""
+        if not include_archive:
+            return 'messages'
+        return f'''(
+            SELECT {MESSAGE_COLUMNS}, NULL AS archived_at FROM messages
+            UNION ALL
+            SELECT {MESSAGE_COLUMNS}, archived_at FROM archive.messages
+        )'''
     
-    def get_all_items(self, item_type=None, status=None):
+    def get_all_items(self, item_type=None, status=None, include_archive=False):
         """Get items. If status is None, returns ALL items (active, claimed, resolved)."""
-        conn = self.get_connection()
+        conn = self.get_connection(attach_archive=include_archive)
         cursor = conn.cursor()
         
         # Base query
-        query = '''
-            SELECT i.*, u.username 
-            FROM items i 
-            JOIN users u ON i.user_id = u.id
+        # Usernames are resolved by the views through get_usernames
+        query = f'''
+            SELECT i.*
+            FROM {self._items_source(include_archive)} i
         '''
         
         params = []
@@ -164,12 +788,12 @@ class Database:
         conn.close()
         return items
     
-    def get_user_items(self, user_id):
+    def get_user_items(self, user_id, include_archive=False):
         """Get items belonging to a specific user"""
-        conn = self.get_connection()
+        conn = self.get_connection(attach_archive=include_archive)
         cursor = conn.cursor()
-        cursor.execute('''
-            SELECT * FROM items 
+        cursor.execute(f'''
+            SELECT * FROM {self._items_source(include_archive)} 
             WHERE user_id = ? 
             ORDER BY created_at DESC
         ''', (user_id,))
@@ -177,82 +801,738 @@ class Database:
         conn.close()
         return items
     
-    def update_item(self, item_id, title, description, status, user_id=None):
-        """Update an item - user_id is for permission check"""
+    # Projected list queries: only the columns each view shows, as compact records (models.py)
+    def _fetch_records(self, record_type, query, params=(), attach_archive=False):
+        """Run a query selecting exactly record_type's fields and return a list of record_type"""
+        conn = self.get_connection(attach_archive=attach_archive)
+        cursor = conn.cursor()
+        # Plain tuples: no sqlite3.Row is built just to be converted again
+        cursor.row_factory = None
+        cursor.execute(query, params)
+        records = list(map(record_type._make, cursor.fetchall()))
+        conn.close()
+        return records
+    
+    def get_item_cards(self, item_type=None):
+        """Active items for Browse Items, newest first"""
+        query = f"SELECT {', '.join(ItemCard._fields)} FROM items WHERE status = 'active'"
+        params = []
+        if item_type:
+            query += ' AND item_type = ?'
+            params.append(item_type)
+        query += ' ORDER BY created_at DESC'
+        return self._fetch_records(ItemCard, query, params)
+    
+    def get_admin_item_rows(self, status=None, include_archive=False):
+        """Items for the admin list; status None means all statuses"""
+        query = f'''
+            SELECT id, title, item_type, status, image_url, user_id, {'archived_at' if include_archive else 'NULL'}
+            FROM {self._items_source(include_archive)}
+        '''
+        params = []
+        if status:
+            query += ' WHERE status = ?'
+            params.append(status)
+        query += ' ORDER BY created_at DESC'
+        return self._fetch_records(AdminItemRow, query, params, attach_archive=include_archive)
+    
+    def get_my_items(self, user_id, include_archive=False):
+        """A user's own items for My Items, newest first"""
+        return self._fetch_records(MyItemRow, f'''
+            SELECT id, title, description, item_type, image_url, status, created_at, version,
+                   {'archived_at' if include_archive else 'NULL'}
+            FROM {self._items_source(include_archive)}
+            WHERE user_id = ?
+            ORDER BY created_at DESC
+        ''', (user_id,), attach_archive=include_archive)
+    
+    def get_item(self, item_id):
+        """Get a single item by ID"""
         conn = self.get_connection()
         cursor = conn.cursor()
+        cursor.execute('SELECT * FROM items WHERE id = ?', (item_id,))
+        item = cursor.fetchone()
+        conn.close()
+        return item
+    
+    def get_items_page(self, limit, offset=0, item_type=None, status='active'):
+        """Get one page of items, newest first, returns (items, total_count)"""
+        conditions = []
+        params = []
+        if status:
+            conditions.append('status = ?')
+            params.append(status)
+        if item_type:
+            conditions.append('item_type = ?')
+            params.append(item_type)
+        where = (' WHERE ' + ' AND '.join(conditions)) if conditions else ''
         
-        if user_id:  # Student can only update their own items
-            cursor.execute('''
-                UPDATE items 
-                SET title = ?, description = ?, status = ?, updated_at = CURRENT_TIMESTAMP
-                WHERE id = ? AND user_id = ?
-            ''', (title, description, status, item_id, user_id))
-        else:  # Admin can update any item
-            cursor.execute('''
-                UPDATE items 
-                SET title = ?, description = ?, status = ?, updated_at = CURRENT_TIMESTAMP
-                WHERE id = ?
-            ''', (title, description, status, item_id))
-        
-        conn.commit()
-        success = cursor.rowcount > 0
+        conn = self.get_connection()
+        cursor = conn.cursor()
+        cursor.execute(f'SELECT COUNT(*) FROM items{where}', params)
+        total = cursor.fetchone()[0]
+        cursor.execute(
+            f'SELECT * FROM items{where} ORDER BY created_at DESC, id DESC LIMIT ? OFFSET ?',
+            params + [limit, offset]
+        )
+        items = cursor.fetchall()
+        conn.close()
+        return items, total
+    
+    def get_item_stats(self):
+        """Aggregate item counts by type and by status, computed in SQL"""
+        conn = self.get_connection()
+        cursor = conn.cursor()
+        cursor.execute('''
+            SELECT item_type, status, COUNT(*) AS item_count
+            FROM items
+            GROUP BY item_type, status
+        ''')
+        stats = {'total': 0, 'by_type': {'lost': 0, 'found': 0}, 'by_status': {'active': 0, 'claimed': 0, 'resolved': 0}}
+        for row in cursor.fetchall():
+            stats['total'] += row['item_count']
+            stats['by_type'][row['item_type']] += row['item_count']
+            stats['by_status'][row['status']] += row['item_count']
         conn.close()
-        return success
+        return stats
+    
+    def update_item(self, item_id, title, description, status, user_id=None, expected_version=None):
+        """
+        Update an item - user_id is for permission check
+        With expected_version the update is a compare-and-swap: it only applies if the
+        item is still at the version the editor loaded
+        Returns (updated, current) where current is the item as it now stands after a
+        version conflict, otherwise None
+        """
+        sig = near_duplicates.signature(near_duplicates.item_text(title, description))
+        version_check = '' if expected_version is None else ' AND version = ?'
+        # resolved_at is stamped when the item becomes resolved and cleared when it is re-opened
+        resolved_at = "resolved_at = CASE WHEN ? != 'resolved' THEN NULL WHEN status = 'resolved' THEN resolved_at ELSE CURRENT_TIMESTAMP END"
+        version_args = () if expected_version is None else (expected_version,)
+        
+        def update(cursor):
+            if user_id:  # Student can only update their own items
+                cursor.execute(f'''
+                    UPDATE items 
+                    SET title = ?, description = ?, status = ?, {resolved_at},
+                        updated_at = CURRENT_TIMESTAMP, version = version + 1
+                    WHERE id = ? AND user_id = ?{version_check}
+                ''', (title, description, status, status, item_id, user_id) + version_args)
+            else:  # Admin can update any item
+                cursor.execute(f'''
+                    UPDATE items 
+                    SET title = ?, description = ?, status = ?, {resolved_at},
+                        updated_at = CURRENT_TIMESTAMP, version = version + 1
+                    WHERE id = ?{version_check}
+                ''', (title, description, status, status, item_id) + version_args)
+            if cursor.rowcount > 0:
+                self._index_item_text(cursor, item_id, sig)
+                return True, None
+            
+            # Nothing matched: tell a version conflict apart from a missing item or wrong owner
+            current = cursor.execute('SELECT * FROM items WHERE id = ?', (item_id,)).fetchone()
+            if expected_version is not None and current and (not user_id or current['user_id'] == user_id):
+                return False, current
+            return False, None
+        
+        return self._execute_write(update)
     
     def delete_item(self, item_id, user_id=None):
         """Delete an item - user_id is for permission check"""
+        def delete(cursor):
+            if user_id:  # Student can only delete their own items
+                item = cursor.execute('SELECT * FROM items WHERE id = ? AND user_id = ?', (item_id, user_id)).fetchone()
+            else:  # Admin can delete any item
+                item = cursor.execute('SELECT * FROM items WHERE id = ?', (item_id,)).fetchone()
+            if not item:
+                return False
+            cursor.execute('DELETE FROM items WHERE id = ?', (item_id,))
+            cursor.execute('DELETE FROM item_images WHERE item_id = ?', (item_id,))
+            self._remove_from_rollups(cursor, item)
+            return True
+        
+        return self._execute_write(delete)
+    
+    # Near-duplicate detection
+    def find_near_duplicates(self, title, description, item_type=None, threshold=0.5, exclude_id=None):
+        """
+        Find active items whose title+description is similar to the given text
+        Only items sharing an LSH bucket are compared, so this doesn't scan all items
+        Returns a list of dicts with the item columns plus similarity, most similar first
+        """
+        sig = near_duplicates.signature(near_duplicates.item_text(title, description))
+        buckets = near_duplicates.band_buckets(sig)
+        
+        conn = self.get_connection()
+        cursor = conn.cursor()
+        bucket_match = ' OR '.join(['(l.band = ? AND l.bucket = ?)'] * len(buckets))
+        query = f'''
+            SELECT i.*, h.signature FROM items i
+            JOIN item_minhash h ON h.item_id = i.id
+            WHERE i.id IN (SELECT l.item_id FROM item_lsh l WHERE {bucket_match})
+              AND i.status = 'active'
+        '''
+        params = [value for bucket in buckets for value in bucket]
+        if item_type:
+            query += ' AND i.item_type = ?'
+            params.append(item_type)
+        cursor.execute(query, params)
+        
+        matches = []
+        for row in cursor.fetchall():
+            if row['id'] == exclude_id:
+                continue
+            score = near_duplicates.similarity(sig, near_duplicates.from_blob(row['signature']))
+            if score >= threshold:
+                item = dict(row, similarity=score)
+                del item['signature']
+                matches.append(item)
+        conn.close()
+        
+        matches.sort(key=lambda item: item['similarity'], reverse=True)
+        return matches
+    
+    def find_duplicate_pairs(self, threshold=0.5, limit=500):
+        """
+        Pairs of active items of the same type that look like the same post, most similar first
+        Only active items take part in the bucket self-join; at most limit pairs are returned
+        """
         conn = self.get_connection()
         cursor = conn.cursor()
+        cursor.execute('''
+            SELECT DISTINCT a.item_id AS first_id, b.item_id AS second_id
+            FROM item_lsh a
+            JOIN items ia ON ia.id = a.item_id AND ia.status = 'active'
+            JOIN item_lsh b ON b.band = a.band AND b.bucket = a.bucket AND b.item_id > a.item_id
+            JOIN items ib ON ib.id = b.item_id AND ib.status = 'active' AND ib.item_type = ia.item_type
+        ''')
+        candidates = cursor.fetchall()
         
-        if user_id:  # Student can only delete their own items
-            cursor.execute('DELETE FROM items WHERE id = ? AND user_id = ?', (item_id, user_id))
-        else:  # Admin can delete any item
-            cursor.execute('DELETE FROM items WHERE id = ?', (item_id,))
+        ids = {row['first_id'] for row in candidates} | {row['second_id'] for row in candidates}
+        signatures = {}
+        if ids:
+            placeholders = ', '.join('?' * len(ids))
+            cursor.execute(
+                f'SELECT item_id, signature FROM item_minhash WHERE item_id IN ({placeholders})', list(ids)
+            )
+            signatures = {row['item_id']: near_duplicates.from_blob(row['signature']) for row in cursor.fetchall()}
         
-        conn.commit()
-        success = cursor.rowcount > 0
+        scored = []
+        for row in candidates:
+            first, second = signatures.get(row['first_id']), signatures.get(row['second_id'])
+            if first is None or second is None:
+                continue
+            score = near_duplicates.similarity(first, second)
+            if score >= threshold:
+                scored.append((row['first_id'], row['second_id'], score))
+        scored = heapq.nlargest(limit, scored, key=lambda pair: pair[2])
+        
+        # Only the items in the returned pairs are loaded
+        items = {}
+        pair_ids = {item_id for pair in scored for item_id in pair[:2]}
+        if pair_ids:
+            placeholders = ', '.join('?' * len(pair_ids))
+            cursor.execute(f'SELECT * FROM items WHERE id IN ({placeholders})', list(pair_ids))
+            items = {row['id']: dict(row) for row in cursor.fetchall()}
         conn.close()
-        return success
+        
+        return [(items[first_id], items[second_id], score) for first_id, second_id, score in scored]
     
-    # Message operations
-    def create_message(self, sender_id, receiver_id, item_id, message):
-        """Create a new message"""
+    def merge_items(self, keep_id, duplicate_id):
+        """Fold a duplicate post into the one being kept: move its messages and photos, then delete it"""
+        def merge(cursor):
+            keep = cursor.execute('SELECT * FROM items WHERE id = ?', (keep_id,)).fetchone()
+            duplicate = cursor.execute('SELECT * FROM items WHERE id = ?', (duplicate_id,)).fetchone()
+            if not keep or not duplicate or keep_id == duplicate_id:
+                return False
+            
+            cursor.execute('UPDATE messages SET item_id = ? WHERE item_id = ?', (keep_id, duplicate_id))
+            offset = cursor.execute(
+                'SELECT COALESCE(MAX(position) + 1, 0) FROM item_images WHERE item_id = ?', (keep_id,)
+            ).fetchone()[0]
+            cursor.execute(
+                'UPDATE item_images SET item_id = ?, position = position + ? WHERE item_id = ?',
+                (keep_id, offset, duplicate_id)
+            )
+            if not keep['image_url'] and duplicate['image_url']:
+                cursor.execute(
+                    'UPDATE items SET image_url = ?, version = version + 1 WHERE id = ?', (duplicate['image_url'], keep_id)
+                )
+            cursor.execute('DELETE FROM items WHERE id = ?', (duplicate_id,))
+            self._remove_from_rollups(cursor, duplicate)
+            return True
+        
+        return self._execute_write(merge)
+    
+    # Analytics rollups
+    def _remove_from_rollups(self, cursor, item):
+        """
+        Take a deleted item back out of the rollups, so they match what a rebuild gives
+        Not done by a trigger because archiving also deletes items, and those still count
+        """
+        cursor.execute(
+            'UPDATE daily_item_rollups SET reported = reported - 1 WHERE day = date(?) AND item_type = ?',
+            (item['created_at'], item['item_type'])
+        )
+        if item['status'] == 'resolved' and item['resolved_at']:
+            cursor.execute(
+                'UPDATE daily_item_rollups SET resolved = resolved - 1 WHERE day = date(?) AND item_type = ?',
+                (item['resolved_at'], item['item_type'])
+            )
+            cursor.execute(f'''
+                UPDATE daily_resolution_hours SET items = items - 1
+                WHERE day = date(?) AND item_type = ? AND hours = (
+                    SELECT {RESOLUTION_HOURS.format(row='deleted')}
+                    FROM (SELECT ? AS created_at, ? AS resolved_at) AS deleted
+                )
+            ''', (item['resolved_at'], item['item_type'], item['created_at'], item['resolved_at']))
+    
+    def _rebuild_rollups(self, cursor):
+        """Recompute every rollup from items and messages, archive included (archive must be attached)"""
+        items = self._items_source(True)
+        cursor.execute('DELETE FROM daily_item_rollups')
+        cursor.execute('DELETE FROM daily_resolution_hours')
+        cursor.execute('DELETE FROM daily_message_rollups')
+        cursor.execute(f'''
+            INSERT INTO daily_item_rollups (day, item_type, reported, resolved)
+            SELECT day, item_type, SUM(reported), SUM(resolved) FROM (
+                SELECT date(created_at) AS day, item_type, 1 AS reported, 0 AS resolved FROM {items}
+                UNION ALL
+                SELECT date(resolved_at), item_type, 0, 1 FROM {items}
+                WHERE status = 'resolved' AND resolved_at IS NOT NULL
+            )
+            GROUP BY day, item_type
+        ''')
+        cursor.execute(f'''
+            INSERT INTO daily_resolution_hours (day, item_type, hours, items)
+            SELECT date(resolved_at), item_type, {RESOLUTION_HOURS.format(row='resolved_items')}, COUNT(*)
+            FROM {items} AS resolved_items
+            WHERE status = 'resolved' AND resolved_at IS NOT NULL
+            GROUP BY 1, 2, 3
+        ''')
+        cursor.execute(f'''
+            INSERT INTO daily_message_rollups (day, messages)
+            SELECT date(created_at), COUNT(*) FROM {self._messages_source(True)}
+            GROUP BY 1
+        ''')
+    
+    def rebuild_rollups(self):
+        """Backfill job: rebuild the analytics rollups from scratch in one transaction"""
+        self._execute_write(self._rebuild_rollups, attach_archive=True)
+    
+    def get_rollups(self, days=90):
+        """
+        Daily rollups for the last `days` days
+        Returns dict with 'items' (day, item_type, reported, resolved),
+        'resolution' (day, item_type, hours, items) and 'messages' (day, messages)
+        """
+        since = f'-{int(days)} days'
+        conn = self.get_connection()
+        cursor = conn.cursor()
+        rollups = {}
+        for key, table in (('items', 'daily_item_rollups'), ('resolution', 'daily_resolution_hours'),
+                           ('messages', 'daily_message_rollups')):
+            cursor.execute(f"SELECT * FROM {table} WHERE day >= date('now', ?) ORDER BY day", (since,))
+            rollups[key] = [dict(row) for row in cursor.fetchall()]
+        conn.close()
+        return rollups
+    
+    # Search support
+    def get_search_synonyms(self):
+        """Get the synonym table as {alias: canonical}"""
+        conn = self.get_connection()
+        cursor = conn.cursor()
+        cursor.execute('SELECT alias, canonical FROM search_synonyms')
+        synonyms = {row['alias']: row['canonical'] for row in cursor.fetchall()}
+        conn.close()
+        return synonyms
+    
+    def get_active_titles(self):
+        """Get (id, title) of every active item, for building search indexes"""
+        conn = self.get_connection()
+        cursor = conn.cursor()
+        # Same source as get_item_changes, so an emptied (pruned) log doesn't look like a gap;
+        # read first, so a change committed before the titles are read is just applied twice
+        cursor.execute("SELECT seq FROM sqlite_sequence WHERE name = 'item_changes'")
+        row = cursor.fetchone()
+        last_seq = row[0] if row else 0
+        cursor.execute("SELECT id, title FROM items WHERE status = 'active'")
+        titles = [(row['id'], row['title']) for row in cursor.fetchall()]
+        conn.close()
+        return titles, last_seq
+    
+    def get_item_changes(self, since_seq):
+        """
+        Items changed after since_seq, as ([(id, title or None if no longer active)], last_seq)
+        Returns None if the change log was pruned past since_seq and a full rebuild is needed
+        """
         conn = self.get_connection()
         cursor = conn.cursor()
+        cursor.execute('SELECT MIN(seq) FROM item_changes')
+        first_seq = cursor.fetchone()[0]
+        # sqlite_sequence remembers the last seq even after the log is pruned empty
+        cursor.execute("SELECT seq FROM sqlite_sequence WHERE name = 'item_changes'")
+        row = cursor.fetchone()
+        last_seq = row[0] if row else 0
+        if last_seq > since_seq and (first_seq is None or first_seq > since_seq + 1):
+            conn.close()
+            return None
+        
         cursor.execute('''
-            INSERT INTO messages (sender_id, receiver_id, item_id, message)
-            VALUES (?, ?, ?, ?)
-        ''', (sender_id, receiver_id, item_id, message))
-        conn.commit()
-        message_id = cursor.lastrowid
+            SELECT c.item_id, i.title, i.status
+            FROM (SELECT DISTINCT item_id FROM item_changes WHERE seq > ?) c
+            LEFT JOIN items i ON i.id = c.item_id
+        ''', (since_seq,))
+        changes = [
+            (row['item_id'], row['title'] if row['status'] == 'active' else None)
+            for row in cursor.fetchall()
+        ]
+        conn.close()
+        return changes, last_seq
+    
+    def prune_item_changes(self, max_age_hours=24):
+        """Drop old entries from the item change log"""
+        def delete(cursor):
+            cursor.execute(
+                "DELETE FROM item_changes WHERE changed_at < datetime('now', ?)",
+                (f'-{int(max_age_hours)} hours',)
+            )
+            return cursor.rowcount
+        
+        return self._execute_write(delete)
+    
+    # Notification outbox
+    def claim_notifications(self, limit=500, claim_minutes=10):
+        """
+        Claim up to limit unsent outbox rows for one dispatcher, oldest first
+        A claim keeps other app processes from sending the same rows; claims older than
+        claim_minutes are assumed abandoned (e.g. a crashed dispatcher) and can be taken again
+        Returns dicts with the recipient's username and email and what the event refers to
+        """
+        def claim(cursor):
+            cursor.execute('''
+                UPDATE notification_outbox SET claimed_at = CURRENT_TIMESTAMP
+                WHERE id IN (
+                    SELECT id FROM notification_outbox
+                    WHERE sent_at IS NULL
+                      AND (claimed_at IS NULL OR claimed_at < datetime('now', ?))
+                    ORDER BY id LIMIT ?
+                )
+                RETURNING id
+            ''', (f'-{int(claim_minutes)} minutes', limit))
+            return [row[0] for row in cursor.fetchall()]
+        
+        ids = self._execute_write(claim)
+        if not ids:
+            return []
+        
+        conn = self.get_connection()
+        cursor = conn.cursor()
+        placeholders = ', '.join('?' * len(ids))
+        cursor.execute(f'''
+            SELECT n.id, n.user_id, n.kind, n.item_id, n.ref_id, n.created_at,
+                   u.username, u.email, i.title AS item_title,
+                   m.message, s.username AS sender_name, f.title AS match_title
+            FROM notification_outbox n
+            JOIN users u ON u.id = n.user_id
+            LEFT JOIN items i ON i.id = n.item_id
+            LEFT JOIN messages m ON n.kind = 'message' AND m.id = n.ref_id
+            LEFT JOIN users s ON s.id = m.sender_id
+            LEFT JOIN items f ON n.kind = 'match' AND f.id = n.ref_id
+            WHERE n.id IN ({placeholders})
+            ORDER BY n.id
+        ''', ids)
+        events = [dict(row) for row in cursor.fetchall()]
         conn.close()
-        return message_id
+        return events
+    
+    def finish_notifications(self, ids, sent=True):
+        """Mark claimed outbox rows as sent, or release them to be retried when sent is False"""
+        if not ids:
+            return
+        
+        def update(cursor):
+            placeholders = ', '.join('?' * len(ids))
+            if sent:
+                cursor.execute(
+                    f'UPDATE notification_outbox SET sent_at = CURRENT_TIMESTAMP WHERE id IN ({placeholders})',
+                    list(ids)
+                )
+            else:
+                cursor.execute(
+                    f'UPDATE notification_outbox SET claimed_at = NULL WHERE id IN ({placeholders})',
+                    list(ids)
+                )
+        
+        self._execute_write(update)
     
-    def get_user_messages(self, user_id):
-        """Get messages for a user (both sent and received)"""
+    def prune_notifications(self, max_age_days=7):
+        """Drop old outbox rows; unsent ones that old are no longer worth emailing"""
+        def delete(cursor):
+            cursor.execute(
+                "DELETE FROM notification_outbox WHERE created_at < datetime('now', ?)",
+                (f'-{int(max_age_days)} days',)
+            )
+            return cursor.rowcount
+        
+        return self._execute_write(delete)
+    
+    # Locations
+    def get_buildings(self):
+        """Get all campus buildings in the gazetteer"""
+        conn = self.get_connection()
+        cursor = conn.cursor()
+        cursor.execute('SELECT * FROM buildings ORDER BY name')
+        buildings = cursor.fetchall()
+        conn.close()
+        return buildings
+    
+    def get_building(self, building_id):
+        """Get a campus building by ID"""
+        conn = self.get_connection()
+        cursor = conn.cursor()
+        cursor.execute('SELECT * FROM buildings WHERE id = ?', (building_id,))
+        building = cursor.fetchone()
+        conn.close()
+        return building
+    
+    def add_building(self, name, latitude, longitude):
+        """Add a campus building to the gazetteer"""
+        def insert(cursor):
+            cursor.execute(
+                'INSERT INTO buildings (name, latitude, longitude) VALUES (?, ?, ?)',
+                (name, latitude, longitude)
+            )
+        
+        try:
+            self._execute_write(insert)
+            return True
+        except sqlite3.IntegrityError:
+            return False
+    
+    def find_items_near(self, lat, lon, radius, item_type=None, status='active'):
+        """
+        Find items within radius metres of (lat, lon), nearest first
+        The R*Tree narrows candidates to a bounding box; exact distances are computed here
+        Returns a list of NearbyItemCard
+        """
+        lat_delta = radius / METERS_PER_DEGREE
+        lon_delta = radius / (METERS_PER_DEGREE * max(math.cos(math.radians(lat)), 1e-6))
+        
+        query = f'''
+            SELECT {', '.join('i.' + field for field in ItemCard._fields)} FROM items_location loc
+            JOIN items i ON i.id = loc.id
+            WHERE loc.min_lat <= ? AND loc.max_lat >= ?
+              AND loc.min_lon <= ? AND loc.max_lon >= ?
+        '''
+        params = [lat + lat_delta, lat - lat_delta, lon + lon_delta, lon - lon_delta]
+        if status:
+            query += ' AND i.status = ?'
+            params.append(status)
+        if item_type:
+            query += ' AND i.item_type = ?'
+            params.append(item_type)
+        
+        nearby = []
+        for card in self._fetch_records(ItemCard, query, params):
+            distance = haversine_m(lat, lon, card.latitude, card.longitude)
+            if distance <= radius:
+                nearby.append(NearbyItemCard(*card, distance))
+        
+        nearby.sort(key=lambda item: item.distance_m)
+        return nearby
+    
+    # Item images
+    def get_item_images(self, item_id):
+        """Get all photo URLs of an item in display order"""
+        conn = self.get_connection()
+        cursor = conn.cursor()
+        cursor.execute(
+            'SELECT image_url FROM item_images WHERE item_id = ? ORDER BY position',
+            (item_id,)
+        )
+        urls = [row['image_url'] for row in cursor.fetchall()]
+        conn.close()
+        return urls
+    
+    def get_image_counts(self, item_ids):
+        """Count photos for several items at once, returns {item_id: count}"""
+        item_ids = list(item_ids)
+        if not item_ids:
+            return {}
+        
+        conn = self.get_connection()
+        cursor = conn.cursor()
+        placeholders = ', '.join('?' * len(item_ids))
+        cursor.execute(f'''
+            SELECT item_id, COUNT(*) AS image_count FROM item_images
+            WHERE item_id IN ({placeholders})
+            GROUP BY item_id
+        ''', item_ids)
+        counts = {row['item_id']: row['image_count'] for row in cursor.fetchall()}
+        conn.close()
+        return counts
+    
+    # Upload registry
+    def get_uploaded_image(self, content_hash, min_remaining_hours=24):
+        """
+        Get the hosted URL of a previously uploaded image with this content hash
+        Returns None if unknown or if the hosted copy expires within min_remaining_hours
+        """
         conn = self.get_connection()
         cursor = conn.cursor()
         cursor.execute('''
-            SELECT m.*, 
-                   s.username as sender_username,
-                   r.username as receiver_username,
+            SELECT image_url FROM image_uploads
+            WHERE content_hash = ?
+              AND (expires_at IS NULL OR expires_at > datetime('now', ?))
+        ''', (content_hash, f'+{int(min_remaining_hours)} hours'))
+        row = cursor.fetchone()
+        conn.close()
+        return row['image_url'] if row else None
+    
+    def record_uploaded_image(self, content_hash, image_url, expires_in_seconds=None):
+        """Remember where an image was uploaded; expires_in_seconds=None means it never expires"""
+        def upsert(cursor):
+            cursor.execute('''
+                INSERT OR REPLACE INTO image_uploads (content_hash, image_url, uploaded_at, expires_at)
+                VALUES (?, ?, CURRENT_TIMESTAMP,
+                        CASE WHEN ? IS NULL THEN NULL ELSE datetime('now', ? || ' seconds') END)
+            ''', (content_hash, image_url, expires_in_seconds, f'+{int(expires_in_seconds or 0)}'))
+        
+        self._execute_write(upsert)
+    
+    # Message operations
+    def create_message(self, sender_id, receiver_id, item_id, message):
+        """Create a new message and queue an email notification for the receiver"""
+        def insert(cursor):
+            cursor.execute('''
+                INSERT INTO messages (sender_id, receiver_id, item_id, message)
+                VALUES (?, ?, ?, ?)
+            ''', (sender_id, receiver_id, item_id, message))
+            message_id = cursor.lastrowid
+            cursor.execute('''
+                INSERT INTO notification_outbox (user_id, kind, item_id, ref_id)
+                VALUES (?, 'message', ?, ?)
+            ''', (receiver_id, item_id, message_id))
+            return message_id
+        
+        return self._execute_write(insert)
+    
+    def get_user_messages(self, user_id, include_archive=False):
+        """Get messages for a user (both sent and received), as MessageRow"""
+        return self._fetch_records(MessageRow, f'''
+            SELECT m.id, m.sender_id, m.receiver_id, m.item_id, m.message, m.is_read, m.created_at,
                    i.title as item_title
-            FROM messages m
-            JOIN users s ON m.sender_id = s.id
-            JOIN users r ON m.receiver_id = r.id
-            LEFT JOIN items i ON m.item_id = i.id
+            FROM {self._messages_source(include_archive)} m
+            LEFT JOIN {self._items_source(include_archive)} i ON m.item_id = i.id
             WHERE m.sender_id = ? OR m.receiver_id = ?
             ORDER BY m.created_at DESC
-        ''', (user_id, user_id))
-        messages = cursor.fetchall()
-        conn.close()
-        return messages
+        ''', (user_id, user_id), attach_archive=include_archive)
     
     def mark_message_read(self, message_id):
         """Mark a message as read"""
+        def update(cursor):
+            cursor.execute('UPDATE messages SET is_read = TRUE WHERE id = ?', (message_id,))
+        
+        self._execute_write(update)
+    
+    def get_unread_count(self, user_id):
+        """Number of unread messages received by a user; one primary-key lookup"""
         conn = self.get_connection()
         cursor = conn.cursor()
-        cursor.execute('UPDATE messages SET is_read = TRUE WHERE id = ?', (message_id,))
-        conn.commit()
-        conn.close()
\ No newline at end of file
+        cursor.execute('SELECT unread FROM unread_counts WHERE user_id = ?', (user_id,))
+        row = cursor.fetchone()
+        conn.close()
+        return row['unread'] if row else 0
+    
+    # Maintenance runs
+    def start_maintenance_run(self, min_interval_hours=0):
+        """
+        Record the start of a maintenance run
+        Returns None instead if any run started within min_interval_hours, so concurrent
+        schedulers in other processes don't repeat the same work
+        """
+        def insert(cursor):
+            cursor.execute('''
+                INSERT INTO maintenance_runs (status)
+                SELECT 'running'
+                WHERE NOT EXISTS (
+                    SELECT 1 FROM maintenance_runs WHERE started_at > datetime('now', ?)
+                )
+            ''', (f'-{float(min_interval_hours)} hours',))
+            return cursor.lastrowid if cursor.rowcount else None
+        
+        return self._execute_write(insert)
+    
+    def finish_maintenance_run(self, run_id, duration_ms, status, details):
+        """Store the outcome of a maintenance run"""
+        def update(cursor):
+            cursor.execute('''
+                UPDATE maintenance_runs SET duration_ms = ?, status = ?, details = ?
+                WHERE id = ?
+            ''', (duration_ms, status, details, run_id))
+        
+        self._execute_write(update)
+    
+    def get_maintenance_runs(self, limit=20):
+        """Get the most recent maintenance runs"""
+        conn = self.get_connection()
+        cursor = conn.cursor()
+        cursor.execute('SELECT * FROM maintenance_runs ORDER BY id DESC LIMIT ?', (limit,))
+        runs = cursor.fetchall()
+        conn.close()
+        return runs
+    
+    # Archival
+    def archive_old_records(self, max_age_days=365, batch_size=500):
+        """
+        Move resolved items and messages older than max_age_days into the archive database
+        Works in small batches so the write lock is only held briefly
+        Returns (items_archived, messages_archived)
+        """
+        age = f'-{int(max_age_days)} days'
+        items_archived = self._archive_batches(
+            'items', ITEM_COLUMNS,
+            "status = 'resolved' AND updated_at < datetime('now', ?)", age, batch_size,
+            children=[('item_images', ITEM_IMAGE_COLUMNS, 'item_id')]
+        )
+        messages_archived = self._archive_batches(
+            'messages', MESSAGE_COLUMNS,
+            "created_at < datetime('now', ?)", age, batch_size
+        )
+        return items_archived, messages_archived
+    
+    def _archive_batches(self, table, columns, condition, age, batch_size, children=()):
+        """
+        Move matching rows, batch by batch, through the regular write path
+        children lists (table, columns, foreign key) of rows that move with each parent row;
+        index tables kept by triggers (locations, MinHash) are cleaned up by the DELETE itself
+        """
+        def move_batch(cursor):
+            cursor.execute(f'SELECT id FROM main.{table} WHERE {condition} ORDER BY id LIMIT ?', (age, batch_size))
+            ids = [row[0] for row in cursor.fetchall()]
+            if not ids:
+                return 0
+            
+            placeholders = ', '.join('?' * len(ids))
+            # OR REPLACE keeps a retried batch idempotent if a previous run stopped halfway
+            cursor.execute(f'''
+                INSERT OR REPLACE INTO archive.{table} ({columns})
+                SELECT {columns} FROM main.{table} WHERE id IN ({placeholders})
+            ''', ids)
+            for child, child_columns, foreign_key in children:
+                cursor.execute(f'''
+                    INSERT OR REPLACE INTO archive.{child} ({child_columns})
+                    SELECT {child_columns} FROM main.{child} WHERE {foreign_key} IN ({placeholders})
+                ''', ids)
+                cursor.execute(f'DELETE FROM main.{child} WHERE {foreign_key} IN ({placeholders})', ids)
+            cursor.execute(f'DELETE FROM main.{table} WHERE id IN ({placeholders})', ids)
+            return len(ids)
+        
+        moved = 0
+        while True:
+            # One transaction per batch, so the write lock is released between batches
+            batch = self._execute_write(move_batch, attach_archive=True)
+            if not batch:
+                return moved
+            moved += batch
@@ -0,0 +1,404 @@
+import argparse
+import hashlib
+import io
+import json
+import multiprocessing
+import os
+import random
+import tempfile
+import threading
+import time
+import tracemalloc
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import streamlit as st
+from PIL import Image
+from streamlit import config
+from streamlit.runtime.secrets import Secrets
+from streamlit.testing.v1 import AppTest
+
+from auth import PBKDF2Hasher
+from database import Database
+from storage import ImageStorage
+
+APP_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'app.py')
+PASSWORD = 'loadtest123'
+
+ITEM_NAMES = [
+    'iPhone', 'Samsung phone', 'AirPods', 'wallet', 'student ID card', 'keys', 'water bottle',
+    'backpack', 'umbrella', 'laptop charger', 'calculator', 'USB drive', 'glasses', 'notebook',
+    'hoodie', 'headphones', 'watch', 'textbook', 'bicycle lock', 'lanyard'
+]
+COLOURS = ['black', 'white', 'blue', 'red', 'green', 'grey', 'pink', 'silver', 'brown', 'purple']
+PLACES = ['the library', 'the cafeteria', 'lecture hall B', 'the gym', 'the hostel lobby', 'the car park']
+SEARCH_TERMS = ['phone', 'wallet', 'keys', 'air', 'bottle', 'card', 'bag', 'black', 'charger', 'glasses']
+# Header each page renders, checked so a run that landed on the wrong page isn't timed as this one
+PAGE_HEADERS = {
+    'Browse Items': 'Browse Lost & Found Items',
+    'Messages': '💬 Messages',
+    'Report Item': 'Report Lost or Found Item',
+}
+
+
+def describe_item(rng):
+    colour, name, place = rng.choice(COLOURS), rng.choice(ITEM_NAMES), rng.choice(PLACES)
+    return f"{colour.title()} {name}", f"{colour.title()} {name}, last seen near {place}."
+
+
+def seed_database(path, users, items, messages, iterations, seed):
+    """Create a database with students, items and messages; every student's password is PASSWORD"""
+    db = Database(path)
+    rng = random.Random(seed)
+    # One hash shared by all seeded students: hashing thousands of passwords would dominate seeding
+    password_hash = PBKDF2Hasher(iterations).hash(PASSWORD)
+
+    conn = db.get_connection()
+    conn.executemany(
+        'INSERT OR IGNORE INTO users (username, password_hash, role, email) VALUES (?, ?, ?, ?)',
+        [(f"student{i}", password_hash, 'student', f"student{i}@campus.edu") for i in range(users)]
+    )
+    conn.commit()
+    user_ids = [row['id'] for row in conn.execute("SELECT id FROM users WHERE role = 'student'")]
+    conn.close()
+
+    item_ids = []
+    for _ in range(items):
+        title, description = describe_item(rng)
+        item_ids.append(db.create_item(title, description, rng.choice(['lost', 'found']), None, rng.choice(user_ids)))
+    for _ in range(messages):
+        sender, receiver = rng.sample(user_ids, 2)
+        db.create_message(sender, receiver, rng.choice(item_ids), "Hi, I think this might be mine")
+    return db
+
+
+def start_image_host(latency):
+    """Local stand-in for the ImgBB upload endpoint; returns the running server"""
+    class ImageHostHandler(BaseHTTPRequestHandler):
+        def do_POST(self):
+            body = self.rfile.read(int(self.headers.get('Content-Length', 0)))
+            time.sleep(latency)
+            host, port = self.server.server_address
+            payload = json.dumps({
+                'success': True,
+                'data': {
+                    'url': f"http://{host}:{port}/i/{hashlib.sha1(body).hexdigest()[:16]}.png",
+                    'expiration': '2592000'
+                }
+            }).encode()
+            self.send_response(200)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(payload)))
+            self.end_headers()
+            self.wfile.write(payload)
+
+        def log_message(self, format, *args):
+            pass
+
+    server = ThreadingHTTPServer(('127.0.0.1', 0), ImageHostHandler)
+    threading.Thread(target=server.serve_forever, name="image-host", daemon=True).start()
+    return server
+
+
+class PhotoUpload(io.BytesIO):
+    """Minimal stand-in for Streamlit's UploadedFile"""
+
+    def __init__(self, data, name):
+        super().__init__(data)
+        self.name = name
+
+
+def make_photo(rng):
+    buffer = io.BytesIO()
+    Image.new('RGB', (640, 480), tuple(rng.randrange(256) for _ in range(3))).save(buffer, 'JPEG')
+    return PhotoUpload(buffer.getvalue(), 'photo.jpg')
+
+
+def run_journey(username, rng, storage, timeout):
+    """
+    One simulated student: login -> browse -> search -> message -> report (+ photo upload)
+    Returns (timings by page in seconds, the AppTest, which holds the session's state)
+    """
+    at = AppTest.from_file(APP_PATH, default_timeout=timeout)
+    timings = {}
+    user = None
+
+    def timed(page, action, header=None):
+        started = time.perf_counter()
+        action()
+        seconds = time.perf_counter() - started
+        if at.exception:
+            raise RuntimeError(f"{page}: {at.exception[0].message}")
+        if header and header not in [h.value for h in at.header]:
+            raise RuntimeError(f"{page}: expected the {header!r} page, got {[h.value for h in at.header]}")
+        timings[page] = seconds
+
+    def open_page(page):
+        # AppTest keeps stale widgets in its tree after a view calls st.rerun(), which breaks the
+        # next run; start each page in a fresh AppTest with the signed-in session state carried over
+        nonlocal at
+        at = AppTest.from_file(APP_PATH, default_timeout=timeout)
+        at.session_state['user'] = user
+        at.session_state['page'] = 'dashboard'
+        at.session_state['navigation'] = page
+        at.run()
+
+    def navigate(page):
+        return lambda: open_page(page)
+
+    timed('login page', at.run)
+
+    def login():
+        # The Login tab's fields come before the Register tab's
+        at.text_input[0].input(username)
+        at.text_input[1].input(PASSWORD)
+        next(b for b in at.button if b.label == 'Login').click().run()
+    timed('login', login)
+    if not at.session_state['user']:
+        raise RuntimeError(f"login: {[e.value for e in at.error]}")
+
+    # Login ends in st.rerun() too, so the dashboard starts in a fresh AppTest as well
+    user = at.session_state['user']
+
+    timed('browse', navigate('Browse Items'), PAGE_HEADERS['Browse Items'])
+    timed('search', lambda: at.text_input(key='search_input').input(rng.choice(SEARCH_TERMS)).run())
+
+    send_buttons = [b for b in at.button if b.key and b.key.startswith('send_')]
+    if send_buttons:
+        item_id = rng.choice(send_buttons).key.split('_', 1)[1]
+
+        def send_message():
+            at.text_area(key=f"msg_{item_id}").input("Hi, I think this is mine. Where can I pick it up?")
+            at.button(key=f"send_{item_id}").click().run()
+        timed('send message', send_message)
+
+    timed('messages', navigate('Messages'), PAGE_HEADERS['Messages'])
+    timed('report page', navigate('Report Item'), PAGE_HEADERS['Report Item'])
+
+    def report():
+        title, description = describe_item(rng)
+        next(t for t in at.text_input if t.label == 'Item Title*').input(title)
+        next(t for t in at.text_area if t.label == 'Description*').input(description)
+        next(b for b in at.button if b.label == 'Submit Item').click().run()
+        if at.warning:
+            # Likely-duplicate warning: confirm, as most students would
+            next(b for b in at.button if b.label == 'Submit Item').click().run()
+        if not any('reported successfully' in s.value for s in at.success):
+            raise RuntimeError(f"report: {[e.value for e in at.error] or 'item was not created'}")
+    timed('report', report)
+
+    # AppTest cannot drive st.file_uploader, so the photo goes through ImageStorage directly
+    def upload():
+        (url, error), = storage.upload_images([make_photo(rng)])
+        if error:
+            raise RuntimeError(error)
+    timed('upload', upload)
+
+    return timings, at
+
+
+def rss_bytes():
+    """Resident set size of this process, or None where /proc is not available"""
+    try:
+        with open('/proc/self/statm') as fp:
+            return int(fp.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError, AttributeError):
+        return None
+
+
+def memory_usage(trace_memory):
+    """(current, peak) bytes: Python allocations under tracemalloc, otherwise process RSS"""
+    if trace_memory:
+        return tracemalloc.get_traced_memory()
+    rss = rss_bytes()
+    return rss, rss
+
+
+def percentile(values, pct):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))]
+
+
+# State of one worker process. AppTest swaps process-global state (the runtime instance,
+# st.secrets, config) on every run, so sessions can't share a process; each worker runs
+# one session at a time, and together they behave like several app replicas on one file
+_worker = {}
+
+
+def _init_worker(settings, timeout, trace_memory):
+    config.set_option('global.appTest', True)
+    secrets = Secrets()
+    secrets._secrets = settings
+    st.secrets = secrets
+
+    db = Database(settings['DATABASE_PATH'], use_write_queue=settings['USE_WRITE_QUEUE'],
+                  multi_process=settings['MULTI_PROCESS'])
+    storage = ImageStorage(db)
+    storage.api_key = settings['IMGBB_API_KEY']
+    storage.upload_url = settings['IMGBB_UPLOAD_URL']
+    if trace_memory:
+        tracemalloc.start()
+    _worker.update(db=db, storage=storage, timeout=timeout, trace_memory=trace_memory, sessions=[], warm=False)
+
+
+def _run_session(username, seed):
+    db = _worker['db']
+    if not _worker['warm']:
+        # Warm-up journey: module imports and first-run caches are not per-session costs
+        try:
+            run_journey('student0', random.Random(-seed), _worker['storage'], _worker['timeout'])
+        except Exception:
+            pass
+        db.lock_waits.reset()
+        _worker['memory_baseline'] = memory_usage(_worker['trace_memory'])[0]
+        _worker['warm'] = True
+
+    result = {'pid': os.getpid(), 'timings': {}, 'error': None}
+    try:
+        result['timings'], at = run_journey(username, random.Random(seed), _worker['storage'], _worker['timeout'])
+        # Keep every AppTest alive, as a server keeps every open session's state
+        _worker['sessions'].append(at)
+    except Exception as e:
+        result['error'] = f"{username}: {e}"
+
+    # Running totals for this worker; the parent keeps the latest report from each one
+    result['lock_waits'] = db.lock_waits.snapshot()
+    result['write_queue'] = db.write_queue.metrics() if db.write_queue else None
+    current, peak = memory_usage(_worker['trace_memory'])
+    if current is not None:
+        result['memory'] = {'growth': current - _worker['memory_baseline'], 'peak': peak,
+                            'sessions': len(_worker['sessions'])}
+    return result
+
+
+def run_load_test(args):
+    workdir = tempfile.mkdtemp(prefix='spm-loadtest-')
+    db_path = os.path.abspath(args.db or os.path.join(workdir, 'loadtest.db'))
+    if not os.path.exists(db_path):
+        print(f"Seeding {db_path} ...")
+        seed_database(db_path, args.users, args.items, args.messages, args.hash_iterations, args.seed)
+
+    image_host = start_image_host(args.upload_latency_ms / 1000)
+    settings = {
+        'DATABASE_PATH': db_path,
+        'USE_WRITE_QUEUE': args.write_queue,
+        'MULTI_PROCESS': args.multi_process,
+        'PASSWORD_HASH_ITERATIONS': args.hash_iterations,
+        'MAINTENANCE_IN_APP': False,
+        'IMGBB_API_KEY': 'loadtest',
+        'IMGBB_UPLOAD_URL': f"http://127.0.0.1:{image_host.server_address[1]}/1/upload",
+    }
+
+    timings = {}
+    failures = []
+    workers = {}
+    started = time.perf_counter()
+    with ProcessPoolExecutor(
+        max_workers=args.concurrency,
+        mp_context=multiprocessing.get_context('spawn'),
+        initializer=_init_worker,
+        initargs=(settings, args.timeout, args.tracemalloc)
+    ) as pool:
+        futures = [
+            pool.submit(_run_session, f"student{i % args.users}", args.seed + i)
+            for i in range(1, args.sessions + 1)
+        ]
+        for future in as_completed(futures):
+            result = future.result()
+            workers[result['pid']] = result
+            if result['error']:
+                failures.append(result['error'])
+            for page, seconds in result['timings'].items():
+                timings.setdefault(page, []).append(seconds)
+    elapsed = time.perf_counter() - started
+    image_host.shutdown()
+
+    lock_waits = [worker['lock_waits'] for worker in workers.values()]
+    report = {
+        'sessions': args.sessions,
+        'completed': args.sessions - len(failures),
+        'failed': len(failures),
+        'failures': failures[:10],
+        'concurrency': args.concurrency,
+        'elapsed_s': round(elapsed, 2),
+        'pages': {
+            page: {
+                'count': len(values),
+                'p50_ms': round(percentile(values, 50) * 1000, 1),
+                'p99_ms': round(percentile(values, 99) * 1000, 1),
+                'max_ms': round(max(values) * 1000, 1),
+            }
+            for page, values in timings.items()
+        },
+        'lock_waits': {
+            'acquisitions': sum(waits['acquisitions'] for waits in lock_waits),
+            'contended': sum(waits['contended'] for waits in lock_waits),
+            'total_ms': round(sum(waits['total_ms'] for waits in lock_waits), 1),
+            'max_ms': round(max((waits['max_ms'] for waits in lock_waits), default=0), 1),
+        },
+    }
+    if args.write_queue:
+        queues = [worker['write_queue'] for worker in workers.values() if worker['write_queue']]
+        commits = sum(queue_stats['commits'] for queue_stats in queues)
+        writes = sum(queue_stats['writes'] for queue_stats in queues)
+        report['write_queue'] = {'commits': commits, 'writes': writes, 'avg_batch_size': writes / commits if commits else 0.0}
+    if all('memory' in worker for worker in workers.values()):
+        growth = sum(worker['memory']['growth'] for worker in workers.values())
+        sessions = sum(worker['memory']['sessions'] for worker in workers.values())
+        report['memory'] = {
+            'measure': 'tracemalloc' if args.tracemalloc else 'rss',
+            'growth_mb': round(growth / 2 ** 20, 1),
+            'per_session_kb': round(growth / max(sessions, 1) / 1024, 1),
+            'peak_mb': round(max(worker['memory']['peak'] for worker in workers.values()) / 2 ** 20, 1),
+        }
+    return report
+
+
+def print_report(report):
+    print(f"\n{report['completed']}/{report['sessions']} sessions completed in {report['elapsed_s']} s "
+          f"with {report['concurrency']} concurrent (includes one warm-up journey per worker)")
+    print(f"\n{'page':<14}{'n':>6}{'p50 ms':>10}{'p99 ms':>10}{'max ms':>10}")
+    for page, stats in report['pages'].items():
+        print(f"{page:<14}{stats['count']:>6}{stats['p50_ms']:>10}{stats['p99_ms']:>10}{stats['max_ms']:>10}")
+
+    waits = report['lock_waits']
+    print(f"\nWrite lock: {waits['acquisitions']} acquisitions, {waits['contended']} contended, "
+          f"{waits['total_ms']} ms waiting in total, longest {waits['max_ms']} ms")
+    if 'write_queue' in report:
+        queue_stats = report['write_queue']
+        print(f"Write queue: {queue_stats['commits']} commits, average batch {queue_stats['avg_batch_size']:.1f}")
+    if 'memory' in report:
+        memory = report['memory']
+        print(f"Memory ({memory['measure']}): +{memory['growth_mb']} MB across workers "
+              f"({memory['per_session_kb']} KB per session), peak {memory['peak_mb']} MB in one worker")
+    for failure in report['failures']:
+        print(f"FAILED: {failure}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Concurrent-session load test for Campus Lost & Found")
+    parser.add_argument("--sessions", type=int, default=50, help="Simulated student sessions to run")
+    parser.add_argument("--concurrency", type=int, default=10, help="Worker processes, i.e. sessions running at the same time")
+    parser.add_argument("--db", help="Seeded database to use; created and seeded if it does not exist")
+    parser.add_argument("--users", type=int, default=200, help="Students to seed")
+    parser.add_argument("--items", type=int, default=1000, help="Items to seed")
+    parser.add_argument("--messages", type=int, default=500, help="Messages to seed")
+    parser.add_argument("--hash-iterations", type=int, default=310000, help="PBKDF2 iterations for seeded and app hashes")
+    parser.add_argument("--write-queue", action="store_true", help="Run the app with USE_WRITE_QUEUE")
+    parser.add_argument("--multi-process", action="store_true", help="Run the app with MULTI_PROCESS (WAL, longer busy timeout)")
+    parser.add_argument("--upload-latency-ms", type=float, default=150, help="Simulated image host latency")
+    parser.add_argument("--timeout", type=float, default=60, help="Seconds before a single page run is abandoned")
+    parser.add_argument("--tracemalloc", action="store_true",
+                        help="Measure memory growth with tracemalloc instead of RSS (exact, but slows every page down)")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--json", help="Also write the report to this file")
+    args = parser.parse_args()
+
+    # AppTest re-binds __main__ to app.py inside the workers, so hand the pool functions
+    # that pickle by their importable module name
+    import loadtest
+    result = loadtest.run_load_test(args)
+    print_report(result)
+    if args.json:
+        with open(args.json, 'w') as fp:
+            json.dump(result, fp, indent=2)
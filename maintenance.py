@@ -0,0 +1,152 @@
+import argparse
+import json
+import logging
+import threading
+import time
+from datetime import datetime
+
+from database import Database
+
+logger = logging.getLogger(__name__)
+
+
+def run_maintenance(db, vacuum_pages=1000, full_vacuum=False, archive_after_days=None, rebuild_rollups=False):
+    """
+    Run one maintenance pass: optional archival and rollup backfill, change-log and outbox pruning,
+    ANALYZE/optimize, bounded incremental vacuum and a WAL checkpoint
+    Returns a dict of per-step timings and results
+    """
+    steps = {}
+
+    def timed(name, func):
+        started = time.perf_counter()
+        result = func()
+        steps[name] = {'ms': round((time.perf_counter() - started) * 1000, 1), 'result': result}
+
+    if archive_after_days:
+        timed('archive', lambda: db.archive_old_records(max_age_days=archive_after_days))
+
+    if rebuild_rollups:
+        timed('rebuild_rollups', db.rebuild_rollups)
+
+    timed('prune_item_changes', db.prune_item_changes)
+    timed('prune_notifications', db.prune_notifications)
+
+    conn = db.get_connection()
+    # PRAGMAs and VACUUM must not run inside an implicit transaction
+    conn.isolation_level = None
+
+    def execute(sql):
+        conn.execute(sql).fetchall()
+
+    try:
+        # Limit rows sampled per index so ANALYZE stays cheap on large tables
+        conn.execute('PRAGMA analysis_limit = 400')
+        timed('analyze', lambda: execute('ANALYZE'))
+        timed('optimize', lambda: execute('PRAGMA optimize'))
+
+        if full_vacuum:
+            # Rewrites the whole file once; also turns on incremental vacuum for older databases
+            conn.execute('PRAGMA auto_vacuum = INCREMENTAL')
+            timed('vacuum', lambda: execute('VACUUM'))
+        elif conn.execute('PRAGMA auto_vacuum').fetchone()[0] == 2:
+            def incremental_vacuum():
+                before = conn.execute('PRAGMA freelist_count').fetchone()[0]
+                conn.execute(f'PRAGMA incremental_vacuum({int(vacuum_pages)})').fetchall()
+                return before - conn.execute('PRAGMA freelist_count').fetchone()[0]
+            timed('incremental_vacuum', incremental_vacuum)
+
+        if conn.execute('PRAGMA journal_mode').fetchone()[0] == 'wal':
+            timed('checkpoint', lambda: list(conn.execute('PRAGMA wal_checkpoint(TRUNCATE)').fetchone()))
+    finally:
+        conn.close()
+
+    return steps
+
+
+def record_maintenance(db, min_interval_hours=0, **options):
+    """
+    Run maintenance and record the run in the maintenance_runs table
+    Returns the run id, or None if another run already happened within min_interval_hours
+    """
+    run_id = db.start_maintenance_run(min_interval_hours)
+    if run_id is None:
+        return None
+
+    started = time.perf_counter()
+    try:
+        steps = run_maintenance(db, **options)
+    except Exception as e:
+        db.finish_maintenance_run(run_id, (time.perf_counter() - started) * 1000, 'failed', str(e))
+        raise
+    db.finish_maintenance_run(run_id, (time.perf_counter() - started) * 1000, 'success', json.dumps(steps))
+    return run_id
+
+
+def in_window(hour, window):
+    """True if hour falls in the [start, end) off-peak window, which may wrap midnight"""
+    start, end = window
+    if start <= end:
+        return start <= hour < end
+    return hour >= start or hour < end
+
+
+class MaintenanceScheduler:
+    """Background thread that runs maintenance once per interval inside the off-peak window"""
+
+    def __init__(self, db, interval_hours=24, window=(2, 5), check_seconds=300, **options):
+        self.db = db
+        self.interval_hours = interval_hours
+        self.window = window
+        self.check_seconds = check_seconds
+        self.options = options
+        self._thread = threading.Thread(target=self._run, name="db-maintenance", daemon=True)
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def _run(self):
+        while True:
+            if in_window(datetime.now().hour, self.window):
+                try:
+                    # The recorded run doubles as a claim, so replicas don't all run it
+                    record_maintenance(self.db, self.interval_hours, **self.options)
+                except Exception:
+                    # Failures inside a run are also recorded in maintenance_runs; this covers
+                    # ones that happen before or after it (e.g. the database is locked)
+                    logger.exception("Scheduled maintenance failed; retrying next interval")
+            time.sleep(self.check_seconds)
+
+
+_schedulers = {}
+_schedulers_lock = threading.Lock()
+
+
+def start_scheduler(db, **kwargs):
+    """Start the maintenance scheduler for a database file once per process"""
+    with _schedulers_lock:
+        if db.db_name not in _schedulers:
+            _schedulers[db.db_name] = MaintenanceScheduler(db, **kwargs).start()
+        return _schedulers[db.db_name]
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run database maintenance for Campus Lost & Found")
+    parser.add_argument("--db", default="database/campus_lost_found.db", help="Path to the SQLite database")
+    parser.add_argument("--full-vacuum", action="store_true", help="Rewrite the file with VACUUM (enables incremental vacuum)")
+    parser.add_argument("--vacuum-pages", type=int, default=1000, help="Pages to reclaim per incremental vacuum")
+    parser.add_argument("--archive-after-days", type=int, help="Also archive records older than this many days")
+    parser.add_argument("--rebuild-rollups", action="store_true", help="Recompute the analytics rollups from raw rows")
+    parser.add_argument("--loop", action="store_true", help="Keep running and schedule maintenance in the off-peak window")
+    args = parser.parse_args()
+
+    database = Database(args.db)
+    options = {'vacuum_pages': args.vacuum_pages, 'archive_after_days': args.archive_after_days}
+    if args.loop:
+        start_scheduler(database, **options)._thread.join()
+    else:
+        run_id = record_maintenance(
+            database, full_vacuum=args.full_vacuum, rebuild_rollups=args.rebuild_rollups, **options
+        )
+        print(database.get_maintenance_runs(limit=1)[0]['details'] if run_id else "Skipped")
@@ -0,0 +1,25 @@
+from collections import namedtuple
+
+# Compact, read-only records for list views. Each holds only the columns its view shows and,
+# being a namedtuple, has no per-instance __dict__; Database builds them straight from plain
+# row tuples, so listing thousands of items costs far less than full sqlite3.Row objects.
+
+# Browse Items cards
+ItemCard = namedtuple(
+    'ItemCard',
+    'id title description item_type image_url user_id created_at latitude longitude building_id'
+)
+# Browse Items cards in a "near" search, nearest first
+NearbyItemCard = namedtuple('NearbyItemCard', ItemCard._fields + ('distance_m',))
+# Admin Panel item list; the description is only loaded when an item is opened for editing
+AdminItemRow = namedtuple('AdminItemRow', 'id title item_type status image_url user_id archived_at')
+# My Items list
+MyItemRow = namedtuple(
+    'MyItemRow',
+    'id title description item_type image_url status created_at version archived_at'
+)
+# Messages page
+MessageRow = namedtuple(
+    'MessageRow',
+    'id sender_id receiver_id item_id message is_read created_at item_title'
+)
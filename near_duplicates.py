@@ -0,0 +1,61 @@
+import hashlib
+import random
+import re
+from array import array
+
+# 64 MinHash permutations split into 16 LSH bands of 4 rows: two posts with an estimated
+# Jaccard similarity of 0.5 share at least one band with probability ~0.65, at 0.7 ~0.99
+NUM_PERMUTATIONS = 64
+BANDS = 16
+ROWS_PER_BAND = NUM_PERMUTATIONS // BANDS
+SHINGLE_SIZE = 4
+
+_PRIME = (1 << 61) - 1
+# Fixed seed: signatures are stored, so the permutations must never change between runs
+_rng = random.Random(20240917)
+_PERMUTATIONS = [(_rng.randrange(1, _PRIME), _rng.randrange(0, _PRIME)) for _ in range(NUM_PERMUTATIONS)]
+
+
+def _stable_hash(data):
+    return int.from_bytes(hashlib.blake2b(data, digest_size=8).digest(), 'big')
+
+
+def shingles(text):
+    """Character shingles of the normalised text, so 'air pods' and 'airpods' overlap"""
+    normalised = ' '.join(re.findall(r'[a-z0-9]+', text.lower()))
+    if len(normalised) <= SHINGLE_SIZE:
+        return {normalised}
+    return {normalised[i:i + SHINGLE_SIZE] for i in range(len(normalised) - SHINGLE_SIZE + 1)}
+
+
+def signature(text):
+    """MinHash signature of a text as a list of NUM_PERMUTATIONS integers"""
+    hashes = [_stable_hash(shingle.encode()) for shingle in shingles(text)]
+    return [min((a * h + b) % _PRIME for h in hashes) for a, b in _PERMUTATIONS]
+
+
+def band_buckets(sig):
+    """One bucket key per band; items sharing any bucket are duplicate candidates"""
+    buckets = []
+    for band in range(BANDS):
+        rows = array('Q', sig[band * ROWS_PER_BAND:(band + 1) * ROWS_PER_BAND]).tobytes()
+        # Signed so the key fits SQLite's 64-bit INTEGER
+        buckets.append((band, int.from_bytes(hashlib.blake2b(rows, digest_size=8).digest(), 'big', signed=True)))
+    return buckets
+
+
+def similarity(sig_a, sig_b):
+    """Estimated Jaccard similarity of the two texts"""
+    return sum(1 for a, b in zip(sig_a, sig_b) if a == b) / NUM_PERMUTATIONS
+
+
+def to_blob(sig):
+    return array('Q', sig).tobytes()
+
+
+def from_blob(blob):
+    return array('Q', blob).tolist()
+
+
+def item_text(title, description):
+    return f"{title} {description or ''}"
@@ -0,0 +1,172 @@
+import argparse
+import logging
+import os
+import smtplib
+import threading
+import time
+from email.message import EmailMessage
+
+from database import Database
+
+logger = logging.getLogger(__name__)
+
+MESSAGE_PREVIEW_CHARS = 200
+# Shown when an event's item was deleted or merged away before the digest went out
+DELETED_ITEM = "(deleted item)"
+
+
+def describe_event(event):
+    """One line of a digest for an outbox event"""
+    if event['kind'] == 'message':
+        about = f" about \"{event['item_title']}\"" if event['item_title'] else ""
+        preview = (event['message'] or "")[:MESSAGE_PREVIEW_CHARS]
+        return f"- {event['sender_name'] or 'Someone'} sent you a message{about}: {preview}"
+    match_title = event['match_title'] or DELETED_ITEM
+    item_title = event['item_title'] or DELETED_ITEM
+    return f"- A found item, \"{match_title}\", looks like your lost \"{item_title}\""
+
+
+def build_digest(sender, events):
+    """One email covering all of a user's pending events"""
+    messages = sum(1 for event in events if event['kind'] == 'message')
+    matches = len(events) - messages
+    summary = []
+    if messages:
+        summary.append(f"{messages} new message{'s' if messages != 1 else ''}")
+    if matches:
+        summary.append(f"{matches} possible match{'es' if matches != 1 else ''}")
+
+    email = EmailMessage()
+    email['From'] = sender
+    email['To'] = events[0]['email']
+    email['Subject'] = f"Campus Lost & Found: {' and '.join(summary)}"
+    email.set_content(
+        f"Hi {events[0]['username']},\n\n"
+        + "\n".join(describe_event(event) for event in events)
+        + "\n\nLog in to Campus Lost & Found to reply or claim your item.\n"
+    )
+    return email
+
+
+def connect(host, port=25, username=None, password=None, starttls=False, timeout=30):
+    """Open one SMTP connection, reused for every digest in a pass"""
+    smtp = smtplib.SMTP(host, port, timeout=timeout)
+    if starttls:
+        smtp.starttls()
+    if username:
+        smtp.login(username, password)
+    return smtp
+
+
+def dispatch_pending(db, sender, batch_size=500, **smtp_options):
+    """
+    Send everything pending in the outbox as one digest per user, over a single SMTP connection
+    The connection is only opened if there is something to send
+    Returns (emails_sent, events_done)
+    """
+    emails_sent = 0
+    events_done = 0
+    smtp = None
+    try:
+        while True:
+            events = db.claim_notifications(batch_size)
+            if not events:
+                break
+
+            by_user = {}
+            for event in events:
+                by_user.setdefault(event['user_id'], []).append(event)
+
+            done = []
+            try:
+                for user_events in by_user.values():
+                    ids = [event['id'] for event in user_events]
+                    # Users without an email address can't be told; their events are just closed
+                    if user_events[0]['email']:
+                        if smtp is None:
+                            smtp = connect(**smtp_options)
+                        try:
+                            smtp.send_message(build_digest(sender, user_events))
+                            emails_sent += 1
+                        except smtplib.SMTPRecipientsRefused:
+                            pass  # Retrying won't help a rejected address
+                    done.extend(ids)
+            except (smtplib.SMTPException, OSError):
+                # Keep what went out; release the rest so the next pass retries it
+                sent = set(done)
+                db.finish_notifications(done)
+                db.finish_notifications([event['id'] for event in events if event['id'] not in sent], sent=False)
+                raise
+
+            db.finish_notifications(done)
+            events_done += len(done)
+            if len(events) < batch_size:
+                break
+    finally:
+        if smtp is not None:
+            try:
+                smtp.quit()
+            except (smtplib.SMTPException, OSError):
+                pass
+    return emails_sent, events_done
+
+
+class NotificationDispatcher:
+    """Background thread that sends the outbox as per-user digests once per interval"""
+
+    def __init__(self, db, sender, interval_seconds=300, **options):
+        self.db = db
+        self.sender = sender
+        # Events arriving within one interval are coalesced into a single email per user
+        self.interval_seconds = interval_seconds
+        self.options = options
+        self._thread = threading.Thread(target=self._run, name="notification-dispatcher", daemon=True)
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def _run(self):
+        while True:
+            time.sleep(self.interval_seconds)
+            try:
+                dispatch_pending(self.db, self.sender, **self.options)
+            except Exception:
+                # Unsent events were released (or their claim expires); try again next interval
+                logger.exception("Notification dispatch failed; retrying next interval")
+
+
+_dispatchers = {}
+_dispatchers_lock = threading.Lock()
+
+
+def start_dispatcher(db, sender, **kwargs):
+    """Start the notification dispatcher for a database file once per process"""
+    with _dispatchers_lock:
+        if db.db_name not in _dispatchers:
+            _dispatchers[db.db_name] = NotificationDispatcher(db, sender, **kwargs).start()
+        return _dispatchers[db.db_name]
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Send Campus Lost & Found notification digests by email")
+    parser.add_argument("--db", default="database/campus_lost_found.db", help="Path to the SQLite database")
+    parser.add_argument("--host", default="localhost", help="SMTP server")
+    parser.add_argument("--port", type=int, default=25, help="SMTP port")
+    parser.add_argument("--sender", default="lostfound@campus.edu", help="From address of the digests")
+    parser.add_argument("--username", help="SMTP login; the password is read from SMTP_PASSWORD")
+    parser.add_argument("--starttls", action="store_true", help="Upgrade the connection with STARTTLS")
+    parser.add_argument("--loop", action="store_true", help="Keep running and send digests every --interval seconds")
+    parser.add_argument("--interval", type=int, default=300, help="Seconds between digests with --loop")
+    args = parser.parse_args()
+
+    database = Database(args.db)
+    options = {
+        'host': args.host, 'port': args.port, 'username': args.username,
+        'password': os.environ.get('SMTP_PASSWORD'), 'starttls': args.starttls
+    }
+    if args.loop:
+        start_dispatcher(database, args.sender, interval_seconds=args.interval, **options)._thread.join()
+    else:
+        emails, events = dispatch_pending(database, args.sender, **options)
+        print(f"Sent {emails} digest(s) covering {events} event(s)")
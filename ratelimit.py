@@ -0,0 +1,58 @@
+import threading
+import time
+
+from cache import LRUCache
+
+
+class TokenBucket:
+    """Allows bursts of up to capacity events, refilled at rate tokens per second"""
+
+    def __init__(self, capacity, rate):
+        self.capacity = capacity
+        self.rate = rate
+        self.tokens = capacity
+        self.updated = time.monotonic()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def available(self, tokens=1):
+        """True if consume(tokens) would succeed, without taking them"""
+        self._refill()
+        return self.tokens >= tokens
+
+    def consume(self, tokens=1):
+        self._refill()
+        if self.tokens >= tokens:
+            self.tokens -= tokens
+            return True
+        return False
+
+
+class RateLimiter:
+    """One token bucket per key (username, client address, ...), bounded by an LRU"""
+
+    def __init__(self, capacity, rate, max_keys=10000):
+        self.capacity = capacity
+        self.rate = rate
+        self._buckets = LRUCache(max_keys)
+        self._lock = threading.Lock()
+
+    def _bucket(self, key):
+        bucket = self._buckets.get(key)
+        if bucket is None:
+            bucket = TokenBucket(self.capacity, self.rate)
+            self._buckets.set(key, bucket)
+        return bucket
+
+    def allow(self, key):
+        """Count one event for key; False if its bucket is empty"""
+        with self._lock:
+            return self._bucket(key).consume()
+
+    def check(self, key):
+        """True if key has budget left, without counting an event (charge it with allow() later)"""
+        with self._lock:
+            return self._bucket(key).available()
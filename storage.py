@@ -1,64 +1,129 @@
 import streamlit as st
-import requests
 import base64
+import hashlib
 import io
-from PIL import Image
+from concurrent.futures import ThreadPoolExecutor
+
+ALLOWED_FORMATS = ('JPEG', 'PNG', 'GIF')
+# Anything with more pixels than this is rejected before it is ever decoded
+MAX_IMAGE_PIXELS = 40_000_000
+
+# Shared across sessions so a burst of reports can't open unbounded upload connections
+_upload_pool = ThreadPoolExecutor(max_workers=4, thread_name_prefix="image-upload")
+
+
+def validate_image_file(image_file, max_size_mb=5, max_pixels=MAX_IMAGE_PIXELS):
+    """
+    Validate an uploaded image without copying it
+    Size comes from the stream length; format and dimensions come from the
+    header via Pillow, which does not decode any pixel data here
+    """
+    image_file.seek(0, io.SEEK_END)
+    size = image_file.tell()
+    image_file.seek(0)
+    if size > max_size_mb * 1024 * 1024:
+        return False, f"Image size must be less than {max_size_mb}MB"
+    
+    # Imported here so pages that never see an upload don't pay for Pillow
+    from PIL import Image
+    try:
+        with Image.open(image_file) as img:
+            image_format = img.format
+            width, height = img.size
+    except Image.DecompressionBombError:
+        return False, "Image dimensions are too large"
+    except Exception:
+        return False, "File is not a valid image"
+    finally:
+        image_file.seek(0)
+    
+    # Check the real format rather than the browser-supplied MIME type
+    if image_format not in ALLOWED_FORMATS:
+        return False, "Only JPEG, PNG, and GIF images are allowed"
+    
+    if width * height > max_pixels:
+        return False, "Image dimensions are too large"
+    
+    return True, "Image is valid"
 
 
 class ImageStorage:
-    def __init__(self):
+    def __init__(self, db=None):
         self.api_key = 'imgbb_api_key'
+        self.upload_url = "https://api.imgbb.com/1/upload"
+        # Optional Database used as a content-hash -> URL registry to skip repeat uploads
+        self.db = db
+        self.expiration = 2592000
     
     def upload_image(self, image_file):
         """
         Upload image to ImgBB free hosting service
         Returns URL if successful, None otherwise
         """
+        url, error = self._send(image_file)
+        if error:
+            st.error(error)
+        return url
+    
+    def upload_images(self, image_files):
+        """
+        Validate and upload several images concurrently
+        Returns a list of (url, error) in the same order as image_files
+        """
+        return list(_upload_pool.map(self._validate_and_send, image_files))
+    
+    def _validate_and_send(self, image_file):
+        valid, msg = self.validate_image(image_file)
+        if not valid:
+            return None, f"{image_file.name}: {msg}"
+        return self._send(image_file)
+    
+    def _send(self, image_file):
+        """Upload one image; safe to call from worker threads (no Streamlit calls)"""
         if self.api_key == "imgbb_api_key":
-            st.error("Please set up your ImgBB API key in storage.py")
-            return None
+            return None, "Please set up your ImgBB API key in storage.py"
             
         try:
-            # Convert to bytes
-            img_bytes = image_file.getvalue()
-            
-            # Encode to base64
-            encoded_image = base64.b64encode(img_bytes).decode()
+            # Hash and encode straight from the upload buffer, without an intermediate bytes copy
+            with image_file.getbuffer() as img_buffer:
+                content_hash = hashlib.sha256(img_buffer).hexdigest()
+                
+                # Reuse an earlier upload of the same bytes unless its hosted copy is about to expire
+                if self.db:
+                    known_url = self.db.get_uploaded_image(content_hash)
+                    if known_url:
+                        return known_url, None
+                
+                encoded_image = base64.b64encode(img_buffer)
             
             # Prepare API request
-            url = "https://api.imgbb.com/1/upload"
             payload = {
                 'key': self.api_key,
                 'image': encoded_image,
-                'expiration': 2592000
+                'expiration': self.expiration
             }
             
-            # Upload image
-            response = requests.post(url, data=payload)
+            # Upload image; requests is only imported once someone actually uploads
+            import requests
+            response = requests.post(self.upload_url, data=payload)
             result = response.json()
             
             if result.get('success'):
-                return result['data']['url']
+                image_url = result['data']['url']
+                if self.db:
+                    # ImgBB reports the expiration in seconds; 0 means the image never expires
+                    expires_in = int(result['data'].get('expiration') or 0) or None
+                    self.db.record_uploaded_image(content_hash, image_url, expires_in)
+                return image_url, None
             else:
-                st.error(f"Image upload failed: {result.get('error', {}).get('message', 'Unknown error')}")
-                return None
+                return None, f"Image upload failed: {result.get('error', {}).get('message', 'Unknown error')}"
                 
         except Exception as e:
-            st.error(f"Error uploading image: {str(e)}")
-            return None
+            return None, f"Error uploading image: {str(e)}"
     
     def validate_image(self, image_file, max_size_mb=5):
-        """Validate image file size and type"""
-        # Check file size (5MB limit)
-        if len(image_file.getvalue()) > max_size_mb * 1024 * 1024:
-            return False, f"Image size must be less than {max_size_mb}MB"
-        
-        # Check file type
-        allowed_types = ['image/jpeg', 'image/jpg', 'image/png', 'image/gif']
-        if image_file.type not in allowed_types:
-            return False, "Only JPEG, PNG, and GIF images are allowed"
-        
-        return True, "Image is valid"
+        """Validate image file size, real format and dimensions"""
+        return validate_image_file(image_file, max_size_mb)
 
 # Alternative: Local storage fallback (for development without API key)
 class LocalImageStorage:
@@ -67,15 +132,18 @@ class LocalImageStorage:
         st.warning("Using local image storage - images won't persist between sessions")
         return "https://via.placeholder.com/300x200?text=Lost+Found+Item"
     
+    def upload_images(self, image_files):
+        """Validate several images and return placeholders, as (url, error) pairs"""
+        st.warning("Using local image storage - images won't persist between sessions")
+        results = []
+        for image_file in image_files:
+            valid, msg = self.validate_image(image_file)
+            if valid:
+                results.append(("https://via.placeholder.com/300x200?text=Lost+Found+Item", None))
+            else:
+                results.append((None, f"{image_file.name}: {msg}"))
+        return results
+    
     def validate_image(self, image_file, max_size_mb=5):
-        """Validate image file size and type"""
-        # Check file size (5MB limit)
-        if len(image_file.getvalue()) > max_size_mb * 1024 * 1024:
-            return False, f"Image size must be less than {max_size_mb}MB"
-        
-        # Check file type
-        allowed_types = ['image/jpeg', 'image/jpg', 'image/png', 'image/gif']
-        if image_file.type not in allowed_types:
-            return False, "Only JPEG, PNG, and GIF images are allowed"
-        
-        return True, "Image is valid"
\ No newline at end of file
+        """Validate image file size, real format and dimensions"""
+        return validate_image_file(image_file, max_size_mb)
\ No newline at end of file
@@ -0,0 +1,127 @@
+import argparse
+import multiprocessing
+import os
+import random
+import sqlite3
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from database import Database
+
+TITLES = ['Black wallet', 'Blue water bottle', 'iPhone', 'Student ID card', 'Keys on a lanyard', 'Grey hoodie']
+PLACES = ['the library', 'the cafeteria', 'lecture hall B', 'the gym', 'the hostel lobby']
+
+
+def run_worker(path, worker, operations, use_write_queue, start_at, seed):
+    """
+    One app process: a mix of item/message writes, edits and list reads against the shared file
+    Returns what it wrote, so the parent can check that every write is still there
+    """
+    db = Database(path, use_write_queue=use_write_queue, multi_process=True)
+    rng = random.Random(seed + worker)
+    conn = db.get_connection()
+    user_ids = [row['id'] for row in conn.execute('SELECT id FROM users')]
+    conn.close()
+    written = {'items': [], 'messages': [], 'updates': 0, 'reads': 0}
+    errors = []
+    write_seconds = []
+
+    # Start every worker together so their writes really contend for the lock
+    time.sleep(max(0, start_at - time.time()))
+    for i in range(operations):
+        roll = rng.random()
+        started = time.perf_counter()
+        try:
+            if roll < 0.3 or not written['items']:
+                title = rng.choice(TITLES)
+                written['items'].append(db.create_item(
+                    title, f"{title} left near {rng.choice(PLACES)} (worker {worker}, op {i})",
+                    rng.choice(['lost', 'found']), None, rng.choice(user_ids)
+                ))
+            elif roll < 0.55:
+                sender, receiver = rng.sample(user_ids, 2)
+                written['messages'].append(
+                    db.create_message(sender, receiver, rng.choice(written['items']), f"worker {worker} op {i}")
+                )
+            elif roll < 0.7:
+                item = db.get_item(rng.choice(written['items']))
+                db.update_item(item['id'], item['title'], item['description'] + '.', 'active')
+                written['updates'] += 1
+            else:
+                db.get_item_cards()
+                db.get_user_messages(rng.choice(user_ids))
+                written['reads'] += 1
+                continue
+            write_seconds.append(time.perf_counter() - started)
+        except sqlite3.OperationalError as e:
+            errors.append(str(e))
+    return worker, written, errors, write_seconds
+
+
+def percentile(values, fraction):
+    if not values:
+        return 0.0
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * fraction))]
+
+
+def run_stress_test(args):
+    path = args.db or os.path.join(tempfile.mkdtemp(prefix='spm-stress-'), 'stress.db')
+    db = Database(path, multi_process=True)
+    for i in range(args.users):
+        db.create_user(f"stress{i}", "not-a-real-hash", 'student', f"stress{i}@campus.edu")
+
+    print(f"{args.processes} processes x {args.operations} operations against {path}")
+    start_at = time.time() + 3
+    with ProcessPoolExecutor(args.processes, mp_context=multiprocessing.get_context('spawn')) as pool:
+        futures = [
+            pool.submit(run_worker, path, worker, args.operations, args.write_queue, start_at, args.seed)
+            for worker in range(args.processes)
+        ]
+        results = [future.result() for future in futures]
+    elapsed = time.time() - start_at
+
+    conn = db.get_connection()
+    existing_items = {row[0] for row in conn.execute('SELECT id FROM items')}
+    existing_messages = {row[0] for row in conn.execute('SELECT id FROM messages')}
+    integrity = conn.execute('PRAGMA integrity_check').fetchone()[0]
+    conn.close()
+
+    lock_errors = 0
+    lost = 0
+    writes = 0
+    write_seconds = []
+    for worker, written, errors, seconds in results:
+        lock_errors += sum(1 for error in errors if 'locked' in error)
+        missing = [i for i in written['items'] if i not in existing_items]
+        missing += [i for i in written['messages'] if i not in existing_messages]
+        lost += len(missing)
+        writes += len(written['items']) + len(written['messages']) + written['updates']
+        write_seconds += seconds
+        if errors or missing:
+            print(f"  worker {worker}: {len(errors)} error(s), {len(missing)} lost write(s); first error: "
+                  f"{errors[0] if errors else '-'}")
+
+    print(f"\n{writes} writes in {elapsed:.1f} s ({writes / elapsed:.0f}/s), "
+          f"write p50 {percentile(write_seconds, 0.5) * 1000:.1f} ms, p99 {percentile(write_seconds, 0.99) * 1000:.1f} ms")
+    print(f"'database is locked' errors: {lock_errors}")
+    print(f"Lost writes: {lost}")
+    print(f"Integrity check: {integrity}")
+    return lock_errors == 0 and lost == 0 and integrity == 'ok'
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Several processes writing and reading one database file with MULTI_PROCESS settings"
+    )
+    parser.add_argument("--processes", type=int, default=4, help="Concurrent app processes")
+    parser.add_argument("--operations", type=int, default=300, help="Operations per process")
+    parser.add_argument("--users", type=int, default=20, help="Students to seed")
+    parser.add_argument("--write-queue", action="store_true", help="Also route each process's writes through its write queue")
+    parser.add_argument("--db", help="Database file to use (default: a fresh temporary file)")
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    sys.exit(0 if run_stress_test(args) else 1)
@@ -1,10 +1,25 @@
+import json
 import streamlit as st
+from maintenance import record_maintenance
+from views.item_view import describe_item_changes
+
+# Duplicate scans keep the most similar pairs and show them a page at a time
+DUPLICATE_SCAN_LIMIT = 500
+DUPLICATES_PER_PAGE = 10
+
+def _median_hours(histogram):
+    """Median of a (hours, items) histogram frame"""
+    histogram = histogram.sort_values('hours')
+    cumulative = histogram['items'].cumsum()
+    return histogram['hours'][cumulative >= histogram['items'].sum() / 2].iloc[0]
 
 def show_admin_panel(db, auth):
     st.header("Admin Panel")
     
     # Create tabs for different admin sections
-    tab1, tab2, tab3 = st.tabs(["Manage Items", "Manage Admins", "Statistics"])
+    tab1, tab2, tab3, tab4, tab5, tab6, tab7 = st.tabs(
+        ["Manage Items", "Manage Admins", "Statistics", "Maintenance", "Campus Buildings", "Duplicates", "Analytics"]
+    )
     
     # --- TAB 1: MANAGE ITEMS ---
     with tab1:
@@ -14,47 +29,69 @@ def show_admin_panel(db, auth):
         col_filter1, col_filter2 = st.columns(2)
         with col_filter1:
             filter_status = st.selectbox("Filter Status", ["All", "active", "claimed", "resolved"])
+        with col_filter2:
+            include_archive = st.checkbox("Include archived items")
         
         status_arg = filter_status if filter_status != "All" else None
         
         # Fetch and Filter Items
         if filter_status == "All":
-            items = db.get_all_items(status=None)
+            items = db.get_admin_item_rows(status=None, include_archive=include_archive)
         else:
-            items = db.get_all_items(status=filter_status)
+            items = db.get_admin_item_rows(status=filter_status, include_archive=include_archive)
             
         if not items:
             st.info("No items found.")
         
+        usernames = db.get_usernames(item.user_id for item in items)
+        
         # Display Items Card View
         for item in items:
             with st.container():
                 # Edit Mode Check
-                is_editing = st.session_state.get(f"edit_mode_{item['id']}", False)
+                is_editing = st.session_state.get(f"edit_mode_{item.id}", False)
+                # List rows are projected; the full item is only loaded for the one being edited
+                editing = db.get_item(item.id) if is_editing else None
                 
-                if is_editing:
+                if editing:
                     # --- EDIT FORM ---
-                    with st.form(key=f"edit_form_{item['id']}"):
-                        st.subheader(f"Editing: {item['title']}")
-                        new_title = st.text_input("Title", value=item['title'])
-                        new_desc = st.text_area("Description", value=item['description'])
+                    with st.form(key=f"edit_form_{item.id}"):
+                        st.subheader(f"Editing: {editing['title']}")
+                        conflict = st.session_state.pop(f"edit_conflict_{item.id}", None)
+                        if conflict is not None:
+                            st.warning("This item was changed by someone else while you were editing. "
+                                       "The form now shows the latest version; review it and save again.")
+                            for change in conflict:
+                                st.markdown(change)
+                        new_title = st.text_input("Title", value=editing['title'])
+                        new_desc = st.text_area("Description", value=editing['description'])
                         new_status = st.selectbox(
                             "Status", 
                             ["active", "claimed", "resolved"],
-                            index=["active", "claimed", "resolved"].index(item['status'])
+                            index=["active", "claimed", "resolved"].index(editing['status'])
                         )
                         
                         c1, c2 = st.columns(2)
                         with c1:
                             if st.form_submit_button("💾 Save"):
-                                success = db.update_item(item['id'], new_title, new_desc, new_status)
+                                base = st.session_state.get(f"edit_base_{item.id}", dict(editing))
+                                success, current = db.update_item(
+                                    item.id, new_title, new_desc, new_status, expected_version=base['version']
+                                )
                                 if success:
                                     st.success("Updated!")
-                                    st.session_state[f"edit_mode_{item['id']}"] = False
+                                    st.session_state[f"edit_mode_{item.id}"] = False
                                     st.rerun()
+                                elif current:
+                                    # Someone saved first: reload their version instead of overwriting it
+                                    st.session_state[f"edit_conflict_{item.id}"] = describe_item_changes(base, current)
+                                    st.session_state[f"edit_base_{item.id}"] = dict(current)
+                                    st.rerun()
+                                else:
+                                    st.error("This item no longer exists.")
                         with c2:
                             if st.form_submit_button("❌ Cancel"):
-                                st.session_state[f"edit_mode_{item['id']}"] = False
+                                st.session_state[f"edit_mode_{item.id}"] = False
                                 st.rerun()
                                 
                 else:
@@ -62,30 +99,35 @@ def show_admin_panel(db, auth):
                     col1, col2, col3, col4 = st.columns([1, 2, 1, 1])
                     
                     with col1:
-                        if item['image_url']:
-                            st.image(item['image_url'], width=80)
+                        if item.image_url:
+                            st.image(item.image_url, width=80)
                         else:
                             st.write("📷 No Img")
                             
                     with col2:
-                        st.markdown(f"**{item['title']}**")
-                        st.caption(f"By: {item['username']} | {item['item_type'].upper()}")
+                        st.markdown(f"**{item.title}**")
+                        st.caption(f"By: {usernames.get(item.user_id, 'unknown')} | {item.item_type.upper()}")
                         
                     with col3:
-                        if item['status'] == 'active':
-                            st.success(f"● {item['status']}")
-                        elif item['status'] == 'resolved':
-                            st.info(f"● {item['status']}")
+                        if item.status == 'active':
+                            st.success(f"● {item.status}")
+                        elif item.status == 'resolved':
+                            st.info(f"● {item.status}")
                         else:
-                            st.warning(f"● {item['status']}")
+                            st.warning(f"● {item.status}")
                             
                     with col4:
-                        if st.button("✏️ Edit", key=f"btn_edit_{item['id']}"):
-                            st.session_state[f"edit_mode_{item['id']}"] = True
-                            st.rerun()
-                        if st.button("🗑️ Del", key=f"btn_del_{item['id']}"):
-                            db.delete_item(item['id'])
-                            st.rerun()
+                        if include_archive and item.archived_at:
+                            st.caption(f"🗄️ Archived {item.archived_at[:10]}")
+                        else:
+                            if st.button("✏️ Edit", key=f"btn_edit_{item.id}"):
+                                st.session_state[f"edit_mode_{item.id}"] = True
+                                # The version being edited, checked again on save
+                                st.session_state[f"edit_base_{item.id}"] = dict(db.get_item(item.id))
+                                st.rerun()
+                            if st.button("🗑️ Del", key=f"btn_del_{item.id}"):
+                                db.delete_item(item.id)
+                                st.rerun()
             st.markdown("---")
 
     # --- TAB 2: MANAGE ADMINS ---
@@ -124,11 +166,11 @@ def show_admin_panel(db, auth):
     with tab3:
         st.subheader("System Overview")
         
-        all_items = db.get_all_items()
-        total_items = len(all_items)
-        lost_count = len([i for i in all_items if i['item_type'] == 'lost'])
-        found_count = len([i for i in all_items if i['item_type'] == 'found'])
-        active_count = len([i for i in all_items if i['status'] == 'active'])
+        stats = db.get_item_stats()
+        total_items = stats['total']
+        lost_count = stats['by_type']['lost']
+        found_count = stats['by_type']['found']
+        active_count = stats['by_status']['active']
         
         m1, m2, m3 = st.columns(3)
         m1.metric("Total Items", total_items)
@@ -138,4 +180,198 @@ def show_admin_panel(db, auth):
         st.markdown("### Status Breakdown")
         s1, s2 = st.columns(2)
         s1.metric("Active Cases", active_count)
-        s2.metric("Resolved/Claimed", total_items - active_count)
\ No newline at end of file
+        s2.metric("Resolved/Claimed", total_items - active_count)
+        
+        if db.write_queue:
+            st.markdown("### Write Queue")
+            queue_stats = db.write_queue.metrics()
+            w1, w2, w3, w4 = st.columns(4)
+            w1.metric("Queue Depth", queue_stats['queue_depth'])
+            w2.metric("Group Commits", queue_stats['commits'])
+            w3.metric("Avg Batch Size", f"{queue_stats['avg_batch_size']:.1f}")
+            w4.metric("Largest Batch", queue_stats['largest_batch_size'])
+    
+    # --- TAB 4: MAINTENANCE ---
+    with tab4:
+        st.subheader("Archive Old Records")
+        st.markdown("Moves **resolved** items and messages older than the chosen age into the archive database.")
+        
+        with st.form("archive_form"):
+            max_age_days = st.number_input("Archive records older than (days)", min_value=1, value=365, step=30)
+            if st.form_submit_button("Archive Now"):
+                items_archived, messages_archived = db.archive_old_records(max_age_days=max_age_days)
+                st.success(f"Archived {items_archived} items and {messages_archived} messages.")
+        
+        st.subheader("Database Maintenance")
+        st.markdown("ANALYZE, incremental vacuum and WAL checkpoints run automatically in the off-peak window.")
+        
+        with st.form("maintenance_form"):
+            full_vacuum = st.checkbox("Full VACUUM (rewrites the file; enables incremental vacuum on older databases)")
+            if st.form_submit_button("Run Maintenance Now"):
+                with st.spinner("Running maintenance..."):
+                    record_maintenance(db, full_vacuum=full_vacuum)
+                st.success("Maintenance complete.")
+        
+        runs = db.get_maintenance_runs()
+        if runs:
+            st.markdown("### Recent Runs")
+            rows = []
+            for run in runs:
+                row = {
+                    'Started': run['started_at'],
+                    'Status': run['status'],
+                    'Duration (ms)': round(run['duration_ms'] or 0, 1)
+                }
+                if run['status'] == 'success':
+                    for step, info in json.loads(run['details']).items():
+                        row[f"{step} (ms)"] = info['ms']
+                else:
+                    row['Error'] = run['details']
+                rows.append(row)
+            st.dataframe(rows, width="stretch")
+        else:
+            st.info("No maintenance runs recorded yet.")
+    
+    # --- TAB 5: CAMPUS BUILDINGS ---
+    with tab5:
+        st.subheader("Campus Buildings")
+        st.markdown("Buildings listed here can be picked as an item's location and used for **Near** searches.")
+        
+        with st.form("add_building_form"):
+            building_name = st.text_input("Building Name")
+            b1, b2 = st.columns(2)
+            building_lat = b1.number_input("Latitude", min_value=-90.0, max_value=90.0, value=0.0, format="%.6f")
+            building_lon = b2.number_input("Longitude", min_value=-180.0, max_value=180.0, value=0.0, format="%.6f")
+            
+            if st.form_submit_button("Add Building"):
+                if not building_name:
+                    st.warning("⚠️ Building name is required.")
+                elif db.add_building(building_name, building_lat, building_lon):
+                    st.success(f"✅ Added '{building_name}'.")
+                else:
+                    st.error(f"❌ A building named '{building_name}' already exists.")
+        
+        buildings = db.get_buildings()
+        if buildings:
+            st.dataframe(
+                [{'Name': b['name'], 'Latitude': b['latitude'], 'Longitude': b['longitude']} for b in buildings],
+                width="stretch"
+            )
+            st.map([{'lat': b['latitude'], 'lon': b['longitude']} for b in buildings])
+    
+    # --- TAB 6: DUPLICATES ---
+    with tab6:
+        st.subheader("Possible Duplicate Posts")
+        st.markdown("Merging moves the duplicate's messages and photos onto the kept post, then deletes the duplicate.")
+        
+        # Scanning compares every active item, so it only runs on request, not on every rerun
+        if st.button("Scan for duplicates"):
+            st.session_state.duplicate_pairs = db.find_duplicate_pairs(limit=DUPLICATE_SCAN_LIMIT)
+        
+        pairs = st.session_state.get('duplicate_pairs')
+        if pairs is None:
+            st.info("Scan to find likely duplicates among active items.")
+        elif not pairs:
+            st.info("No likely duplicates among active items.")
+        else:
+            pages = (len(pairs) - 1) // DUPLICATES_PER_PAGE + 1
+            page = st.number_input("Page", min_value=1, max_value=pages, value=1, key="duplicates_page")
+            start = (page - 1) * DUPLICATES_PER_PAGE
+            st.caption(f"Showing {start + 1}–{min(start + DUPLICATES_PER_PAGE, len(pairs))} of {len(pairs)} pairs"
+                       + (f" (the {DUPLICATE_SCAN_LIMIT} most similar)" if len(pairs) == DUPLICATE_SCAN_LIMIT else ""))
+            
+            for first, second, score in pairs[start:start + DUPLICATES_PER_PAGE]:
+                st.markdown(f"**{score:.0%} similar** · {first['item_type'].upper()}")
+                d1, d2 = st.columns(2)
+                for col, keep, duplicate in ((d1, first, second), (d2, second, first)):
+                    with col:
+                        st.markdown(f"**#{keep['id']} {keep['title']}**")
+                        st.caption(f"{keep['created_at'][:10]} · {keep['description']}")
+                        if st.button(f"Keep #{keep['id']}, merge #{duplicate['id']}", key=f"merge_{keep['id']}_{duplicate['id']}"):
+                            if db.merge_items(keep['id'], duplicate['id']):
+                                # The merged post is gone, so drop every pair it was part of
+                                st.session_state.duplicate_pairs = [
+                                    pair for pair in pairs
+                                    if duplicate['id'] not in (pair[0]['id'], pair[1]['id'])
+                                ]
+                                st.success("Merged!")
+                                st.rerun()
+                            else:
+                                st.error("Could not merge; one of the items no longer exists.")
+                st.markdown("---")
+    
+    # --- TAB 7: ANALYTICS ---
+    with tab7:
+        # Only admins see charts, so the plotting stack is imported on demand
+        import altair as alt
+        import pandas as pd
+        
+        st.subheader("Trends")
+        a1, a2 = st.columns(2)
+        with a1:
+            days = st.selectbox("Period", [30, 90, 365], index=1, format_func=lambda d: f"Last {d} days")
+        with a2:
+            bucket = st.radio("Group by", ["Day", "Week"], horizontal=True)
+        
+        # Charts read the precomputed daily rollups, never the raw items/messages tables
+        rollups = db.get_rollups(days)
+        
+        def by_period(rows):
+            frame = pd.DataFrame(rows)
+            frame['period'] = pd.to_datetime(frame['day'])
+            if bucket == "Week":
+                frame['period'] = frame['period'].dt.to_period('W').dt.start_time
+            return frame
+        
+        if not rollups['items'] and not rollups['messages']:
+            st.info("No activity in this period yet.")
+        else:
+            items = by_period(rollups['items']) if rollups['items'] else None
+            resolution = by_period(rollups['resolution']) if rollups['resolution'] else None
+            if resolution is not None:
+                resolution = resolution[resolution['items'] > 0]
+            messages = by_period(rollups['messages']) if rollups['messages'] else None
+            
+            k1, k2, k3, k4 = st.columns(4)
+            k1.metric("Reported", 0 if items is None else int(items['reported'].sum()))
+            k2.metric("Resolved", 0 if items is None else int(items['resolved'].sum()))
+            k3.metric("Median Hours to Resolve", "—" if resolution is None or resolution.empty else int(_median_hours(resolution)))
+            k4.metric("Messages", 0 if messages is None else int(messages['messages'].sum()))
+            
+            # Charts stretch to the container width by default; the pinned Streamlit's
+            # st.altair_chart has no width= argument yet, and use_container_width is deprecated
+            if items is not None:
+                st.markdown(f"### Items Reported per {bucket}")
+                reported = items.groupby(['period', 'item_type'], as_index=False)['reported'].sum()
+                st.altair_chart(
+                    alt.Chart(reported).mark_bar().encode(
+                        x=alt.X('period:T', title=None),
+                        y=alt.Y('reported:Q', title='Items'),
+                        color=alt.Color('item_type:N', title='Type')
+                    )
+                )
+            
+            if resolution is not None and not resolution.empty:
+                st.markdown(f"### Median Time to Resolution per {bucket}")
+                medians = (
+                    resolution.groupby(['period', 'item_type'])[['hours', 'items']]
+                    .apply(_median_hours)
+                    .reset_index(name='median_hours')
+                )
+                st.altair_chart(
+                    alt.Chart(medians).mark_line(point=True).encode(
+                        x=alt.X('period:T', title=None),
+                        y=alt.Y('median_hours:Q', title='Hours'),
+                        color=alt.Color('item_type:N', title='Type')
+                    )
+                )
+            
+            if messages is not None:
+                st.markdown(f"### Messages per {bucket}")
+                volume = messages.groupby('period', as_index=False)['messages'].sum()
+                st.altair_chart(
+                    alt.Chart(volume).mark_area(opacity=0.6).encode(
+                        x=alt.X('period:T', title=None),
+                        y=alt.Y('messages:Q', title='Messages')
+                    )
+                )
@@ -27,7 +27,7 @@ def show_login_page(auth):
             
             if login_btn:
                 if username and password:
-                    success, message, user = auth.login_user(username, password)
+                    success, message, user = auth.login_user(username, password, client_id=st.context.ip_address)
                     if success:
                         st.session_state.user = user
                         st.session_state.page = "dashboard"
@@ -1,4 +1,18 @@
 import streamlit as st
+from autocomplete import get_autocomplete
+
+MAX_IMAGES_PER_ITEM = 5
+
+def describe_item_changes(before, after):
+    """Markdown lines for the editable fields that differ between two versions of an item"""
+    return [
+        f"**{field.title()}:** {before[field]} → {after[field]}"
+        for field in ('title', 'description', 'status')
+        if before[field] != after[field]
+    ]
+
+def _apply_suggestion(query):
+    st.session_state.search_input = query
 
 def show_browse_items(db):
     """Browse all lost and found items"""
@@ -11,21 +25,63 @@ def show_browse_items(db):
     with col2:
         item_type = st.selectbox("Filter", ["All", "Lost", "Found"])
     
+    # Suggest completions for the last word typed, from the in-memory title index
+    autocomplete = get_autocomplete(db)
+    words = search_query.split()
+    if words and not search_query.endswith(' '):
+        suggestions = [term for term in autocomplete.suggest(words[-1]) if term != words[-1].lower()]
+        if suggestions:
+            cols = st.columns(len(suggestions))
+            for col, term in zip(cols, suggestions):
+                col.button(
+                    term,
+                    key=f"suggest_{term}",
+                    on_click=_apply_suggestion,
+                    args=(" ".join(words[:-1] + [term]),)
+                )
+    
+    # "Near me": pick the building you're at and a search radius
+    buildings = {b['id']: b for b in db.get_buildings()}
+    near_building_id = None
+    if buildings:
+        col3, col4 = st.columns([3, 1])
+        with col3:
+            near_building_id = st.selectbox(
+                "📍 Near",
+                [None] + list(buildings),
+                format_func=lambda bid: "Anywhere" if bid is None else buildings[bid]['name']
+            )
+        with col4:
+            radius = st.number_input("Radius (m)", min_value=50, max_value=5000, value=300, step=50)
+    
     # Get items based on filters
     item_type_filter = None if item_type == "All" else item_type.lower()
-    items = db.get_all_items(item_type_filter, 'active')
+    if near_building_id:
+        here = buildings[near_building_id]
+        items = db.find_items_near(here['latitude'], here['longitude'], radius, item_type_filter)
+    else:
+        items = db.get_item_cards(item_type_filter)
     
     # Filter by search query
     if search_query:
-        search_lower = search_query.lower()
-        items = [item for item in items if 
-                search_lower in item['title'].lower() or 
-                search_lower in item['description'].lower()]
+        # Synonyms count as matches, so "air pods" also finds "AirPods"
+        variants = autocomplete.expand(search_query)
+        items = [item for item in items if any(
+                variant in item.title.lower() or 
+                variant in item.description.lower() for variant in variants)]
     
     if not items:
         st.info("No items found matching your criteria.")
         return
     
+    usernames = db.get_usernames(item.user_id for item in items)
+    image_counts = db.get_image_counts(item.id for item in items)
+    
+    located = [item for item in items if item.latitude is not None]
+    if located:
+        with st.expander(f"🗺️ Map ({len(located)} items with a location)", expanded=bool(near_building_id)):
+            st.map([{'lat': item.latitude, 'lon': item.longitude} for item in located])
+    
     # Display items in a grid
     cols = st.columns(2)
     for idx, item in enumerate(items):
@@ -35,28 +91,38 @@ def show_browse_items(db):
                 st.markdown(f"""
                 <div style='background: linear-gradient(135deg, #f8fafc 0%, #e2e8f0 100%); 
                             padding: 1.5rem; border-radius: 12px; margin-bottom: 1rem;
-                            border-left: 4px solid {"#ef4444" if item["item_type"] == "lost" else "#10b981"};'>
-                    <h3 style='margin: 0; color: #1e293b;'>{item['item_type'].upper()}: {item['title']}</h3>
+                            border-left: 4px solid {"#ef4444" if item.item_type == "lost" else "#10b981"};'>
+                    <h3 style='margin: 0; color: #1e293b;'>{item.item_type.upper()}: {item.title}</h3>
                 </div>
                 """, unsafe_allow_html=True)
                 
-                if item['image_url']:
-                    st.image(item['image_url'], width=300, use_container_width=True)
+                if item.image_url:
+                    st.image(item.image_url, width=300, use_container_width=True)
                 
-                st.write(f"**Description:** {item['description']}")
-                st.write(f"**Posted by:** {item['username']}")
-                st.write(f"**Date:** {item['created_at'][:10]}")
+                # The rest of the gallery is only fetched once the reader asks for it
+                image_count = image_counts.get(item.id, 0)
+                if image_count > 1 and st.toggle(f"📷 Show all {image_count} photos", key=f"gallery_{item.id}"):
+                    st.image(db.get_item_images(item.id), width=140)
+                
+                st.write(f"**Description:** {item.description}")
+                if item.building_id in buildings or item.latitude is not None:
+                    place = buildings[item.building_id]['name'] if item.building_id in buildings else "Pinned location"
+                    if near_building_id:
+                        place += f" ({item.distance_m:.0f} m away)"
+                    st.write(f"**Location:** {place}")
+                st.write(f"**Posted by:** {usernames.get(item.user_id, 'unknown')}")
+                st.write(f"**Date:** {item.created_at[:10]}")
                 
                 # Message button - only for students, not admins
-                if st.session_state.user['role'] == 'student' and st.session_state.user['id'] != item['user_id']:
+                if st.session_state.user['role'] == 'student' and st.session_state.user['id'] != item.user_id:
                     with st.expander("💬 Contact Owner"):
-                        message = st.text_area(f"Message about {item['title']}", key=f"msg_{item['id']}")
-                        if st.button("Send Message", key=f"send_{item['id']}"):
+                        message = st.text_area(f"Message about {item.title}", key=f"msg_{item.id}")
+                        if st.button("Send Message", key=f"send_{item.id}"):
                             if message:
                                 db.create_message(
                                     st.session_state.user['id'],
-                                    item['user_id'],
-                                    item['id'],
+                                    item.user_id,
+                                    item.id,
                                     message
                                 )
                                 st.success("Message sent!")
@@ -74,7 +140,8 @@ def show_my_items(db):
     - ✅ **Resolved** - Item successfully returned to owner (case closed)
     """)
     
-    items = db.get_user_items(st.session_state.user['id'])
+    include_archive = st.checkbox("Show archived items")
+    items = db.get_my_items(st.session_state.user['id'], include_archive=include_archive)
     
     if not items:
         st.info("You haven't posted any items yet. Click 'Report Item' in the sidebar to add one.")
@@ -86,38 +153,53 @@ def show_my_items(db):
             
             with col1:
                 status_emoji = {"active": "🟢", "claimed": "🟡", "resolved": "✅"}
-                st.subheader(f"{item['item_type'].title()}: {item['title']}")
-                if item['image_url']:
-                    st.image(item['image_url'], width=200)
-                st.write(f"**Description:** {item['description']}")
-                st.write(f"**Status:** {status_emoji.get(item['status'], '')} {item['status'].title()}")
-                st.write(f"**Date:** {item['created_at'][:10]}")
+                st.subheader(f"{item.item_type.title()}: {item.title}")
+                if item.image_url:
+                    st.image(item.image_url, width=200)
+                st.write(f"**Description:** {item.description}")
+                st.write(f"**Status:** {status_emoji.get(item.status, '')} {item.status.title()}")
+                st.write(f"**Date:** {item.created_at[:10]}")
             
             with col2:
-                with st.form(key=f"edit_{item['id']}"):
+                if include_archive and item.archived_at:
+                    st.caption(f"🗄️ Archived {item.archived_at[:10]}")
+                    st.markdown("---")
+                    continue
+                
+                with st.form(key=f"edit_{item.id}"):
                     new_status = st.selectbox(
                         "Update Status",
                         ["active", "claimed", "resolved"],
-                        index=["active", "claimed", "resolved"].index(item['status']),
-                        key=f"status_{item['id']}"
+                        index=["active", "claimed", "resolved"].index(item.status),
+                        key=f"status_{item.id}"
                     )
                     
                     if st.form_submit_button("Update"):
-                        success = db.update_item(
-                            item['id'],
-                            item['title'],
-                            item['description'],
+                        # Compare against the version this form was shown with, not the one just re-read
+                        base = st.session_state.get(f"item_base_{item.id}", item._asdict())
+                        success, current = db.update_item(
+                            item.id,
+                            item.title,
+                            item.description,
                             new_status,
-                            st.session_state.user['id']
+                            st.session_state.user['id'],
+                            expected_version=base['version']
                         )
                         if success:
                             st.success("Item updated!")
                             st.rerun()
+                        elif current:
+                            st.warning("Someone else changed this item first, so your update was not saved. "
+                                       "The latest version is shown; please try again.")
+                            for change in describe_item_changes(base, current):
+                                st.markdown(change)
                         else:
                             st.error("Failed to update item")
                 
-                if st.button("Delete", key=f"delete_{item['id']}"):
-                    success = db.delete_item(item['id'], st.session_state.user['id'])
+                st.session_state[f"item_base_{item.id}"] = item._asdict()
+                
+                if st.button("Delete", key=f"delete_{item.id}"):
+                    success = db.delete_item(item.id, st.session_state.user['id'])
                     if success:
                         st.success("Item deleted!")
                         st.rerun()
@@ -126,6 +208,16 @@ def show_my_items(db):
             
             st.markdown("---")
 
+def _unreviewed_duplicates(db, title, description, item_type):
+    """Likely duplicates of a new report, unless the reporter was already warned about this exact report"""
+    report = (title, description, item_type)
+    if st.session_state.get('duplicate_warning_for') == report:
+        return []
+    duplicates = db.find_near_duplicates(title, description, item_type)
+    if duplicates:
+        st.session_state.duplicate_warning_for = report
+    return duplicates
+
 def show_report_item(db, storage):
     """Report a new lost or found item"""
     st.header("Report Lost or Found Item")
@@ -134,30 +226,58 @@ def show_report_item(db, storage):
         title = st.text_input("Item Title*")
         description = st.text_area("Description*")
         item_type = st.selectbox("Type*", ["lost", "found"])
-        image_file = st.file_uploader("Upload Image", type=['jpg', 'jpeg', 'png', 'gif'])
+        
+        buildings = {b['id']: b['name'] for b in db.get_buildings()}
+        building_id = st.selectbox(
+            "Where was it lost/found?",
+            [None] + list(buildings),
+            format_func=lambda bid: "Not specified" if bid is None else buildings[bid]
+        )
+        with st.expander("Exact coordinates (optional)"):
+            latitude = st.number_input("Latitude", min_value=-90.0, max_value=90.0, value=None, format="%.6f")
+            longitude = st.number_input("Longitude", min_value=-180.0, max_value=180.0, value=None, format="%.6f")
+        image_files = st.file_uploader(
+            f"Upload Images (up to {MAX_IMAGES_PER_ITEM})",
+            type=['jpg', 'jpeg', 'png', 'gif'],
+            accept_multiple_files=True
+        )
         
         submitted = st.form_submit_button("Submit Item")
         
         if submitted:
             if not title or not description:
                 st.error("Please fill in all required fields (*)")
+            elif (latitude is None) != (longitude is None):
+                st.error("Please enter both latitude and longitude, or neither")
+            elif len(image_files) > MAX_IMAGES_PER_ITEM:
+                st.error(f"Please attach at most {MAX_IMAGES_PER_ITEM} images")
+            elif duplicates := _unreviewed_duplicates(db, title, description, item_type):
+                st.warning("⚠️ This looks like items that are already posted. Click **Submit Item** again to post it anyway.")
+                for duplicate in duplicates[:5]:
+                    st.write(
+                        f"- **{duplicate['title']}** (posted {duplicate['created_at'][:10]}, "
+                        f"{duplicate['similarity']:.0%} similar)"
+                    )
             else:
-                image_url = None
-                if image_file:
-                    valid, msg = storage.validate_image(image_file)
-                    if valid:
-                        image_url = storage.upload_image(image_file)
-                        if not image_url:
-                            st.error("Failed to upload image")
-                    else:
-                        st.error(msg)
+                image_urls = []
+                if image_files:
+                    # Validated and uploaded concurrently; errors are reported here on the script thread
+                    for url, error in storage.upload_images(image_files):
+                        if url:
+                            image_urls.append(url)
+                        else:
+                            st.error(error)
                 
                 item_id = db.create_item(
                     title, 
                     description, 
                     item_type, 
-                    image_url, 
-                    st.session_state.user['id']
+                    None, 
+                    st.session_state.user['id'],
+                    image_urls=image_urls,
+                    latitude=latitude,
+                    longitude=longitude,
+                    building_id=building_id
                 )
                 
                 if item_id:
@@ -6,7 +6,8 @@ def show_messages(db):
     current_user_id = st.session_state.user['id']
     
     # 1. Fetch all messages
-    all_messages = db.get_user_messages(current_user_id)
+    include_archive = st.sidebar.checkbox("Include archived messages")
+    all_messages = db.get_user_messages(current_user_id, include_archive=include_archive)
     
     if not all_messages:
         st.info("No messages yet. Go to 'Browse Items' to start a conversation!")
@@ -14,25 +15,27 @@ def show_messages(db):
 
     # 2. Group messages
     conversations = {}
+    usernames = db.get_usernames(
+        [msg.sender_id for msg in all_messages] + [msg.receiver_id for msg in all_messages]
+    )
     
     for msg in all_messages:
-        if msg['sender_id'] == current_user_id:
-            partner_id = msg['receiver_id']
-            partner_name = msg['receiver_username']
+        if msg.sender_id == current_user_id:
+            partner_id = msg.receiver_id
         else:
-            partner_id = msg['sender_id']
-            partner_name = msg['sender_username']
+            partner_id = msg.sender_id
+        partner_name = usernames.get(partner_id, 'unknown')
             
         if partner_id not in conversations:
             conversations[partner_id] = {
                 'name': partner_name, 
                 'msgs': [],
-                'last_msg_time': msg['created_at']
+                'last_msg_time': msg.created_at
             }
         
         conversations[partner_id]['msgs'].append(msg)
-        if msg['created_at'] > conversations[partner_id]['last_msg_time']:
-            conversations[partner_id]['last_msg_time'] = msg['created_at']
+        if msg.created_at > conversations[partner_id]['last_msg_time']:
+            conversations[partner_id]['last_msg_time'] = msg.created_at
 
     # 3. Sidebar List
     st.sidebar.markdown("---")
@@ -57,18 +60,18 @@ def show_messages(db):
         partner_data = conversations[selected_partner_id]
         st.markdown(f"### Chat with **{partner_data['name']}**")
         
-        chat_history = sorted(partner_data['msgs'], key=lambda x: x['created_at'])
+        chat_history = sorted(partner_data['msgs'], key=lambda x: x.created_at)
         
         # Container for chat history
         chat_container = st.container()
         
         with chat_container:
             for msg in chat_history:
-                is_me = msg['sender_id'] == current_user_id
+                is_me = msg.sender_id == current_user_id
                 
                 # Mark read
-                if not is_me and not msg['is_read']:
-                    db.mark_message_read(msg['id'])
+                if not is_me and not msg.is_read:
+                    db.mark_message_read(msg.id)
                 
                 # --- CSS Logic ---
                 if is_me:
@@ -88,23 +91,23 @@ def show_messages(db):
 
                 # Item Reference HTML (No indentation to prevent code block rendering)
                 ref_html = ""
-                if msg['item_title']:
-                    ref_html = f"""<div style="font-size: 0.8em; color: #555; margin-bottom: 4px; border-left: 2px solid #075e54; padding-left: 5px;">Re: <b>{msg['item_title']}</b></div>"""
+                if msg.item_title:
+                    ref_html = f"""<div style="font-size: 0.8em; color: #555; margin-bottom: 4px; border-left: 2px solid #075e54; padding-left: 5px;">Re: <b>{msg.item_title}</b></div>"""
 
                 # Render Bubble (No indentation in the HTML string)
                 st.markdown(f"""
 <div style="display: flex; justify-content: {alignment}; margin-bottom: 10px; padding: 0 10px;">
     <div style="background-color: {bg_color}; color: {text_color}; padding: 10px 15px; border-radius: {border_radius}; max-width: 70%; box-shadow: 0 1px 1px rgba(0,0,0,0.1);">
         {ref_html}
-        <div style="margin-bottom: 2px;">{msg['message']}</div>
-        <div style="font-size: 0.65em; color: #555; text-align: right; margin-top: 4px;">{msg['created_at'][11:16]}</div>
+        <div style="margin-bottom: 2px;">{msg.message}</div>
+        <div style="font-size: 0.65em; color: #555; text-align: right; margin-top: 4px;">{msg.created_at[11:16]}</div>
     </div>
 </div>
 """, unsafe_allow_html=True)
 
         # 5. Input Box
         if prompt := st.chat_input(f"Message {partner_data['name']}..."):
-            last_item_id = chat_history[-1]['item_id'] if chat_history else None
+            last_item_id = chat_history[-1].item_id if chat_history else None
             
             db.create_message(
                 sender_id=current_user_id,
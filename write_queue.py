@@ -0,0 +1,177 @@
+import queue
+import threading
+import time
+from concurrent.futures import Future
+
+
+class LockWaitStats:
+    """Time spent waiting for SQLite's write lock (BEGIN IMMEDIATE), across all writers in the process"""
+
+    # Waits longer than this mean another connection was holding the lock
+    CONTENDED_SECONDS = 0.001
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def record(self, seconds):
+        with self._lock:
+            self._acquisitions += 1
+            self._total += seconds
+            self._max = max(self._max, seconds)
+            if seconds > self.CONTENDED_SECONDS:
+                self._contended += 1
+
+    def reset(self):
+        with self._lock:
+            self._acquisitions = 0
+            self._contended = 0
+            self._total = 0.0
+            self._max = 0.0
+
+    def snapshot(self):
+        with self._lock:
+            return {
+                'acquisitions': self._acquisitions,
+                'contended': self._contended,
+                'total_ms': self._total * 1000,
+                'max_ms': self._max * 1000,
+            }
+
+
+class WriteQueue:
+    """Single writer thread that applies queued database writes in group commits"""
+
+    def __init__(self, connect, batch_window=0.005, max_batch_size=64, lock_waits=None):
+        self.connect = connect
+        self.lock_waits = lock_waits
+        self.batch_window = batch_window
+        self.max_batch_size = max_batch_size
+        self._queue = queue.Queue()
+        self._lock = threading.Lock()
+        self._commits = 0
+        self._writes = 0
+        self._last_batch_size = 0
+        self._largest_batch_size = 0
+        self._thread = threading.Thread(target=self._run, name="sqlite-writer", daemon=True)
+        self._thread.start()
+
+    def submit(self, operation):
+        """
+        Queue operation(cursor) for the writer thread
+        Returns a Future resolved with the operation's return value once committed
+        """
+        future = Future()
+        self._queue.put((operation, future))
+        return future
+
+    def metrics(self):
+        """Return queue depth and group-commit batch statistics"""
+        with self._lock:
+            return {
+                'queue_depth': self._queue.qsize(),
+                'commits': self._commits,
+                'writes': self._writes,
+                'last_batch_size': self._last_batch_size,
+                'largest_batch_size': self._largest_batch_size,
+                'avg_batch_size': self._writes / self._commits if self._commits else 0.0,
+            }
+
+    def _run(self):
+        conn = None
+        while True:
+            batch = [self._queue.get()]
+            deadline = time.monotonic() + self.batch_window
+            while len(batch) < self.max_batch_size:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(self._queue.get(timeout=remaining))
+                except queue.Empty:
+                    break
+            # Nothing may end this thread: every caller in the process would wait on it forever
+            try:
+                if conn is None:
+                    conn = self.connect()
+                    # Transactions are managed explicitly so a whole batch shares one commit
+                    conn.isolation_level = None
+                self._commit_batch(conn, batch)
+            except Exception as e:
+                for _, future in batch:
+                    if not future.done():
+                        future.set_exception(e)
+                # The connection may be unusable (e.g. a failed rollback); start the next batch on a new one
+                if conn is not None:
+                    try:
+                        conn.close()
+                    except Exception:
+                        pass
+                    conn = None
+
+    def _commit_batch(self, conn, batch):
+        cursor = conn.cursor()
+        outcomes = []
+        try:
+            started = time.perf_counter()
+            cursor.execute('BEGIN IMMEDIATE')
+            if self.lock_waits:
+                self.lock_waits.record(time.perf_counter() - started)
+            for operation, future in batch:
+                # Skip writes whose caller gave up waiting and cancelled them
+                if not future.set_running_or_notify_cancel():
+                    continue
+                # A savepoint per write keeps one failing caller from undoing the rest
+                cursor.execute('SAVEPOINT queued_write')
+                try:
+                    result = operation(cursor)
+                except Exception as e:
+                    cursor.execute('ROLLBACK TO queued_write')
+                    cursor.execute('RELEASE queued_write')
+                    outcomes.append((future, None, e))
+                else:
+                    cursor.execute('RELEASE queued_write')
+                    outcomes.append((future, result, None))
+            cursor.execute('COMMIT')
+        except Exception as e:
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+            # If this raises too, _run replaces the connection
+            if conn.in_transaction:
+                conn.rollback()
+            return
+
+        with self._lock:
+            self._commits += 1
+            self._writes += len(outcomes)
+            self._last_batch_size = len(outcomes)
+            self._largest_batch_size = max(self._largest_batch_size, len(outcomes))
+
+        for future, result, error in outcomes:
+            if error is not None:
+                future.set_exception(error)
+            else:
+                future.set_result(result)
+
+
+_queues = {}
+_lock_waits = {}
+_queues_lock = threading.Lock()
+
+
+def get_lock_wait_stats(db_name):
+    """Return the process-wide write-lock wait statistics for a database file"""
+    with _queues_lock:
+        if db_name not in _lock_waits:
+            _lock_waits[db_name] = LockWaitStats()
+        return _lock_waits[db_name]
+
+
+def get_write_queue(db_name, connect):
+    """Return the process-wide writer for a database file, starting it on first use"""
+    lock_waits = get_lock_wait_stats(db_name)
+    with _queues_lock:
+        if db_name not in _queues:
+            _queues[db_name] = WriteQueue(connect, lock_waits=lock_waits)
+        return _queues[db_name]